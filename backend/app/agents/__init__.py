@@ -2,10 +2,12 @@ from .query_validator_agent import query_validator_agent
 from .similarity_agent import similarity_agent
 from .web_scraper_agent import web_scraper_agent
 from .summarizer_agent import summarizer_agent
+from .refresh_agent import refresh_agent
 
 __all__ = [
     "query_validator_agent",
     "similarity_agent", 
     "web_scraper_agent",
-    "summarizer_agent"
+    "summarizer_agent",
+    "refresh_agent"
 ]
\ No newline at end of file
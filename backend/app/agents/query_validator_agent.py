@@ -1,11 +1,117 @@
-from app.services import gemini_service
-from typing import Tuple
+from app.services import gemini_service, embedding_service, metrics
+from app.config import settings
+from app.utils import normalize_query
+from collections import Counter
+from typing import List, Optional, Tuple
+import asyncio
+import numpy as np
+
+VALID_EXAMPLES = [
+    "weather in new york",
+    "best places to visit in delhi",
+    "how to learn python",
+    "what is machine learning",
+    "latest news on climate change",
+    "population of tokyo",
+    "python vs javascript for beginners",
+    "symptoms of the flu",
+    "history of the roman empire",
+    "best laptops under 1000 dollars",
+    "how does photosynthesis work",
+    "recipe for chocolate cake"
+]
+
+INVALID_EXAMPLES = [
+    "walk my pet",
+    "call my mom",
+    "remind me to buy milk",
+    "walk my dog and add apples to my grocery list",
+    "send an email to john",
+    "turn off the lights",
+    "set an alarm for 7am",
+    "book a table and call the plumber",
+    "play my favorite song",
+    "text my friend that i am late",
+    "asdf qwer zxcv",
+    "lkjhg poiuy mnbv"
+]
 
 class QueryValidatorAgent:
     def __init__(self):
         self.gemini = gemini_service
+        self.embedding_service = embedding_service
+        self.mode = settings.VALIDATOR_MODE
+        self.margin = settings.VALIDATOR_LOCAL_MARGIN
+        self.decision_counts = Counter()
+        self._example_vectors: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._example_lock = asyncio.Lock()
     
     async def validate_query(self, query: str) -> Tuple[bool, str]:
+        with metrics.stage("validation"):
+            return await self._validate(query)
+    
+    async def _validate(self, query: str) -> Tuple[bool, str]:
+        if self.mode != "llm":
+            local_decision = await self._classify_locally(query)
+            if local_decision is not None:
+                self.decision_counts["local_valid" if local_decision[0] else "local_invalid"] += 1
+                return local_decision
+        
+        self.decision_counts["llm"] += 1
+        return await self._validate_with_ai(query)
+    
+    async def _embed_examples(self, examples: List[str]) -> np.ndarray:
+        vectors = np.array(await self.embedding_service.generate_embeddings(examples), dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    
+    async def _get_example_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._example_vectors is None:
+            async with self._example_lock:
+                if self._example_vectors is None:
+                    self._example_vectors = (
+                        await self._embed_examples(VALID_EXAMPLES),
+                        await self._embed_examples(INVALID_EXAMPLES)
+                    )
+        return self._example_vectors
+    
+    async def _classify_locally(self, query: str) -> Optional[Tuple[bool, str]]:
+        normalized = normalize_query(query)
+        
+        if not normalized:
+            return False, "Query contains no searchable text"
+        
+        if self.mode != "hybrid" and self.mode != "local":
+            return None
+        
+        try:
+            valid_vectors, invalid_vectors = await self._get_example_vectors()
+            vector = np.asarray(await self.embedding_service.generate_embedding(normalized), dtype=np.float32)
+        except Exception as e:
+            print(f"Local validation error: {e}")
+            return None
+        
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        score = float(np.max(valid_vectors @ vector) - np.max(invalid_vectors @ vector))
+        
+        if score >= self.margin:
+            return True, "Looks like an information-seeking query"
+        if self.mode == "local":
+            if score <= -self.margin:
+                return False, "Looks like a personal command or meaningless text"
+            return score >= 0, "Classified locally with low confidence"
+        return None
+    
+    def get_stats(self) -> dict:
+        decided = sum(self.decision_counts.values())
+        local = self.decision_counts["local_valid"] + self.decision_counts["local_invalid"]
+        return {
+            "mode": self.mode,
+            "decisions": decided,
+            "counts": dict(self.decision_counts),
+            "llm_avoided_rate": local / decided if decided else 0.0
+        }
+    
+    async def _validate_with_ai(self, query: str) -> Tuple[bool, str]:
         prompt = f"""
         You are a query validation agent. Analyze the following query and determine if it's a valid web search query.
         
@@ -28,7 +134,11 @@ class QueryValidatorAgent:
         """
         
         try:
-            response = await self.gemini.generate_content(prompt)
+            response = await self.gemini.generate_content(
+                prompt,
+                cache_template="query_validation:v1",
+                cache_input=normalize_query(query)
+            )
             if response:
                 parts = response.strip().split('|', 1)
                 is_valid = parts[0].strip().upper() == "VALID"
@@ -0,0 +1,103 @@
+import asyncio
+import uuid
+from datetime import datetime
+from typing import List, Optional, Set
+from app.config import settings
+from app.database.connection import SessionLocal
+from app.database.crud import QueryCRUD, SearchResultCRUD
+from sqlalchemy.engine import Row
+from app.services import response_cache, worker_pool
+from .web_scraper_agent import web_scraper_agent
+from .summarizer_agent import summarizer_agent
+
+class RefreshAgent:
+    def __init__(self):
+        self.default_ttl = settings.RESULT_TTL
+        self.stale_mode = settings.RESULT_STALE_MODE
+        self._in_flight: Set[uuid.UUID] = set()
+        self._tasks: Set[asyncio.Task] = set()
+    
+    def result_ttl(self, ttl_seconds: Optional[int]) -> Optional[float]:
+        if self.stale_mode == "serve":
+            return None
+        ttl = self.default_ttl if ttl_seconds is None else ttl_seconds
+        return ttl if ttl > 0 else None
+    
+    def remaining_ttl(self, results: List[Row]) -> Optional[float]:
+        ttl = self.result_ttl(results[0].ttl_seconds)
+        if ttl is None:
+            return None
+        
+        oldest = min(r.scraped_at for r in results)
+        age = (datetime.utcnow() - oldest).total_seconds()
+        return ttl - age
+    
+    def handle_stale(self, query_id: uuid.UUID) -> bool:
+        if self.stale_mode == "refresh":
+            return False
+        
+        if self.stale_mode == "revalidate" and query_id not in self._in_flight:
+            self._in_flight.add(query_id)
+            task = asyncio.create_task(self._refresh(query_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return True
+    
+    def _load_query(self, query_id: uuid.UUID) -> Optional[dict]:
+        db = SessionLocal()
+        try:
+            query = QueryCRUD.get_query_by_id(db, query_id)
+            if not query:
+                return None
+            return {
+                "original_query": query.original_query,
+                "normalized_query": query.normalized_query,
+                "ttl_seconds": query.ttl_seconds
+            }
+        finally:
+            db.close()
+    
+    def _replace_results(self, query_id: uuid.UUID, results: List[dict], summary: str):
+        db = SessionLocal()
+        try:
+            SearchResultCRUD.replace_results(db, query_id, results, summary)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    async def _refresh(self, query_id: uuid.UUID):
+        try:
+            query = await worker_pool.run_in_thread(self._load_query, query_id)
+            if not query:
+                return
+            
+            scraped_results = await web_scraper_agent.search_and_scrape(query["original_query"], revalidate=True)
+            if not scraped_results:
+                return
+            
+            summary = await summarizer_agent.summarize_results(query["original_query"], scraped_results)
+            
+            await worker_pool.run_in_thread(self._replace_results, query_id, [{
+                'url': result['url'],
+                'title': result['title'],
+                'content': result['content']
+            } for result in scraped_results], summary)
+            
+            payload = {
+                "summary": summary,
+                "sources": [{
+                    "title": r['title'],
+                    "url": r['url']
+                } for r in scraped_results]
+            }
+            result_ttl = self.result_ttl(query["ttl_seconds"])
+            cache_ttl = settings.RESPONSE_CACHE_TTL if result_ttl is None else min(settings.RESPONSE_CACHE_TTL, result_ttl)
+            await response_cache.set(payload, query_id=query_id, normalized_query=query["normalized_query"], ttl=cache_ttl)
+        except Exception as e:
+            print(f"Refresh error for {query_id}: {e}")
+        finally:
+            self._in_flight.discard(query_id)
+
+refresh_agent = RefreshAgent()
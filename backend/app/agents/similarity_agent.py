@@ -1,43 +1,90 @@
-from app.services import gemini_service, embedding_service
-from app.database.crud import QueryCRUD, QueryGroupCRUD
-from app.models import Query 
+from app.services import gemini_service, embedding_service, metrics
+from app.database.crud import QueryCRUD
 from app.config import settings
+from app.utils import normalize_query
 from sqlalchemy.orm import Session
 from typing import Optional, List, Tuple
 import uuid
 import json
+from collections import Counter
 
 class SimilarityAgent:
     def __init__(self):
         self.gemini = gemini_service
         self.embedding_service = embedding_service
         self.threshold = settings.SIMILARITY_THRESHOLD
+        self.top_k = settings.SIMILARITY_TOP_K
+        self.mode = settings.SIMILARITY_MODE
+        self.accept_threshold = settings.SIMILARITY_ACCEPT_THRESHOLD
+        self.reject_threshold = settings.SIMILARITY_REJECT_THRESHOLD
+        self.llm_candidates = settings.SIMILARITY_LLM_CANDIDATES
+        self.tier_counts = Counter()
     
-    async def find_similar_query(self, db: Session, query: str) -> Optional[uuid.UUID]:
-        all_queries = db.query(Query).all()
-        
-        if not all_queries:
+    async def find_similar_query(self, db: Session, query: str, embedding: Optional[List[float]] = None) -> Optional[uuid.UUID]:
+        if embedding is None:
+            embedding = await self.embedding_service.generate_embedding(query)
+        with metrics.stage("similarity_db"):
+            nearest_queries = QueryCRUD.get_nearest_queries(db, embedding, self.top_k)
+        
+        if not nearest_queries:
+            self.tier_counts["no_candidates"] += 1
             return None
         
-        similar_query_id = await self._check_similarity_with_ai(query, all_queries)
+        if self.mode == "tiered":
+            return await self._find_similar_tiered(query, nearest_queries)
+        
+        similar_query_id = await self._check_similarity_with_ai(query, nearest_queries)
         
         if similar_query_id:
             return similar_query_id
         
-        embedding = self.embedding_service.generate_embedding(query)
-        similar_queries = QueryCRUD.get_similar_queries(db, embedding, self.threshold)
-        
-        if similar_queries:
-            confirmed_similar = await self._confirm_similarity_with_ai(query, similar_queries[0].original_query)
+        closest = nearest_queries[0]
+        if closest.distance < (1 - self.threshold):
+            confirmed_similar = await self._confirm_similarity_with_ai(query, closest.original_query)
             if confirmed_similar:
-                return similar_queries[0].id
+                return closest.id
+        
+        return None
+    
+    async def _find_similar_tiered(self, query: str, nearest_queries: List) -> Optional[uuid.UUID]:
+        closest = nearest_queries[0]
+        closest_similarity = 1 - closest.distance
+        
+        if closest_similarity >= self.accept_threshold:
+            self.tier_counts["auto_accept"] += 1
+            return closest.id
         
+        if closest_similarity < self.reject_threshold:
+            self.tier_counts["auto_reject"] += 1
+            return None
+        
+        candidates = [
+            q for q in nearest_queries[:self.llm_candidates]
+            if 1 - q.distance >= self.reject_threshold
+        ]
+        similar_query_id = await self._check_similarity_with_ai(query, candidates)
+        
+        if similar_query_id and similar_query_id in {q.id for q in candidates}:
+            self.tier_counts["llm_accept"] += 1
+            return similar_query_id
+        
+        self.tier_counts["llm_reject"] += 1
         return None
     
+    def get_stats(self) -> dict:
+        decided = sum(self.tier_counts.values())
+        llm_calls = self.tier_counts["llm_accept"] + self.tier_counts["llm_reject"]
+        return {
+            "mode": self.mode,
+            "decisions": decided,
+            "tiers": dict(self.tier_counts),
+            "llm_call_rate": llm_calls / decided if decided else 0.0
+        }
+    
     async def _check_similarity_with_ai(self, new_query: str, existing_queries: List) -> Optional[uuid.UUID]:
         
         query_batch = []
-        for eq in existing_queries[:20]:
+        for eq in existing_queries[:self.top_k]:
             query_batch.append({
                 "id": str(eq.id),
                 "query": eq.original_query
@@ -68,7 +115,12 @@ class SimilarityAgent:
         """
         
         try:
-            response = await self.gemini.generate_content(prompt)
+            with metrics.stage("similarity_llm"):
+                response = await self.gemini.generate_content(
+                    prompt,
+                    cache_template="similarity_check:v1",
+                    cache_input="\n".join([normalize_query(new_query)] + sorted(q["id"] for q in query_batch))
+                )
             if response:
                 result = response.strip()
                 if result.startswith("SIMILAR|"):
@@ -96,22 +148,17 @@ class SimilarityAgent:
         """
         
         try:
-            response = await self.gemini.generate_content(prompt)
+            with metrics.stage("similarity_llm"):
+                response = await self.gemini.generate_content(
+                    prompt,
+                    cache_template="similarity_confirm:v1",
+                    cache_input=f"{normalize_query(query1)}\n{normalize_query(query2)}"
+                )
             if response:
                 return response.strip().upper() == "YES"
         except Exception as e:
             print(f"AI confirmation error: {e}")
         
         return False
-    
-    def group_similar_queries(self, db: Session, new_query_id: uuid.UUID, similar_query_id: uuid.UUID):
-        existing_group = QueryGroupCRUD.get_group_by_query_id(db, similar_query_id)
-        
-        if existing_group:
-            QueryGroupCRUD.add_query_to_group(db, new_query_id, existing_group.id)
-        else:
-            new_group = QueryGroupCRUD.create_group(db, similar_query_id)
-            QueryGroupCRUD.add_query_to_group(db, similar_query_id, new_group.id)
-            QueryGroupCRUD.add_query_to_group(db, new_query_id, new_group.id)
 
 similarity_agent = SimilarityAgent()
\ No newline at end of file
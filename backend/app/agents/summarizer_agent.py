@@ -1,12 +1,55 @@
-from app.services import gemini_service
-from typing import List, Dict
+from app.services import gemini_service, metrics
+from typing import AsyncIterator, Callable, List, Dict, Optional
+
+class IncompleteSummaryError(Exception):
+    pass
 
 class SummarizerAgent:
     def __init__(self):
         self.gemini = gemini_service
     
-    async def summarize_results(self, query: str, results: List[Dict[str, str]]) -> str:
+    async def summarize_results(self, query: str, results: List[Dict[str, str]],
+                                on_token: Optional[Callable[[str], None]] = None) -> str:
+        if on_token is not None:
+            try:
+                tokens = []
+                async for token in self.stream_summary(query, results):
+                    tokens.append(token)
+                    on_token(token)
+                return "".join(tokens).strip()
+            except IncompleteSummaryError as e:
+                print(f"Summarization stream interrupted, regenerating: {e}")
+        
+        prompt = self._build_prompt(query, results)
         
+        try:
+            with metrics.stage("summarize"):
+                summary = await self.gemini.generate_content(prompt)
+            if summary:
+                return summary.strip()
+            else:
+                return self._create_fallback_summary(query, results)
+        except Exception as e:
+            print(f"Summarization error: {e}")
+            return self._create_fallback_summary(query, results)
+    
+    async def stream_summary(self, query: str, results: List[Dict[str, str]]) -> AsyncIterator[str]:
+        prompt = self._build_prompt(query, results)
+        
+        produced = False
+        try:
+            async for token in self.gemini.generate_content_stream(prompt):
+                produced = True
+                yield token
+        except Exception as e:
+            if produced:
+                raise IncompleteSummaryError(str(e) or type(e).__name__) from e
+            print(f"Summarization stream error: {e}")
+        
+        if not produced:
+            yield self._create_fallback_summary(query, results)
+    
+    def _build_prompt(self, query: str, results: List[Dict[str, str]]) -> str:
         combined_content = ""
         for i, result in enumerate(results, 1):
             combined_content += f"\nSource {i} ({result['title']}):\n{result['content'][:1500]}\n"
@@ -31,16 +74,7 @@ class SummarizerAgent:
         
         Provide the answer as if you're a knowledgeable local guide or expert on the topic.
         """
-        
-        try:
-            summary = await self.gemini.generate_content(prompt)
-            if summary:
-                return summary.strip()
-            else:
-                return self._create_fallback_summary(query, results)
-        except Exception as e:
-            print(f"Summarization error: {e}")
-            return self._create_fallback_summary(query, results)
+        return prompt
     
     def _create_fallback_summary(self, query: str, results: List[Dict[str, str]]) -> str:
         if not results:
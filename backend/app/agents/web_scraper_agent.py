@@ -1,129 +1,203 @@
 import httpx
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from typing import AsyncIterator, Callable, List, Dict, Optional
 import asyncio
 from urllib.parse import quote_plus, urlparse
-import re
+from collections import defaultdict
+from app.config import settings
+from app.services import http_service, metrics, page_cache, worker_pool
+from app.utils import PageExtractor, parse_page, parse_search_results
 
 class WebScraperAgent:
     def __init__(self):
         self.search_engines = {
-            'duckduckgo': 'https://html.duckduckgo.com/html/?q=',
+            'duckduckgo': settings.SEARCH_ENGINE_URL,
             'google': 'https://www.google.com/search?q='
         }
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        self.http = http_service
+        self.worker_pool = worker_pool
+        self.page_cache = page_cache
+    
+    async def search_and_scrape(self, query: str, max_results: int = 5, revalidate: bool = False) -> List[Dict[str, str]]:
+        urls = await self.get_result_urls(query, max_results)
+        return await self.scrape_urls(urls, revalidate)
     
-    async def search_and_scrape(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
+    async def scrape_urls(self, urls: List[str], revalidate: bool = False,
+                          on_page: Optional[Callable[[Dict[str, str]], None]] = None) -> List[Dict[str, str]]:
+        pages = []
+        async for page in self.scrape_as_completed(urls, revalidate):
+            pages.append(page)
+            if on_page is not None:
+                on_page(page)
+        
+        order = {url: i for i, url in enumerate(urls)}
+        return sorted(pages, key=lambda page: order[page['url']])
+    
+    async def get_result_urls(self, query: str, max_results: int = 5) -> List[str]:
         urls = await self._get_search_results(query, max_results)
+        return [url for url in urls if 'duckduckgo.com/y.js' not in url and 'bing.com/aclick' not in url]
+    
+    async def scrape_as_completed(self, urls: List[str], revalidate: bool = False) -> AsyncIterator[Dict[str, str]]:
+        if not urls:
+            return
         
-        results = []
-        async with httpx.AsyncClient(timeout=30.0, headers=self.headers, follow_redirects=True) as client:
-            for url in urls:
+        global_limit = asyncio.Semaphore(max(1, settings.SCRAPE_CONCURRENCY))
+        host_limits = defaultdict(lambda: asyncio.Semaphore(max(1, settings.SCRAPE_PER_HOST_LIMIT)))
+        
+        client = self.http.client
+        
+        async def scrape(url: str) -> Dict[str, str]:
+            async with global_limit, host_limits[urlparse(url).netloc]:
+                return await self._scrape_page(client, url, revalidate)
+        
+        tasks = [asyncio.create_task(scrape(url)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=settings.SCRAPE_TIME_BUDGET):
                 try:
-                    if 'duckduckgo.com/y.js' in url or 'bing.com/aclick' in url:
-                        continue
-                        
-                    content = await self._scrape_page(client, url)
-                    if content and content.get('content'):
-                        results.append(content)
+                    content = await next_done
+                except asyncio.TimeoutError:
+                    pending = sum(1 for task in tasks if not task.done())
+                    metrics.scrape_failure("time_budget", pending)
+                    print(f"Scrape time budget exceeded, dropped {pending} of {len(tasks)} pages")
+                    break
                 except Exception as e:
-                    print(f"Error scraping {url}: {e}")
+                    print(f"Error scraping page: {e}")
                     continue
-        
-        return results
+                
+                if content and content.get('content'):
+                    yield content
+        finally:
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
     
     async def _get_search_results(self, query: str, max_results: int) -> List[str]:
         urls = []
         search_url = self.search_engines['duckduckgo'] + quote_plus(query)
         
-        async with httpx.AsyncClient(timeout=30.0, headers=self.headers) as client:
-            try:
+        client = self.http.client
+        
+        try:
+            with metrics.stage("search_engine"):
                 response = await client.get(search_url)
                 response.raise_for_status()
                 
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                for link in soup.find_all('a', class_='result__a'):
-                    href = link.get('href')
-                    if href and href.startswith('http') and 'duckduckgo.com' not in href:
-                        urls.append(href)
-                        if len(urls) >= max_results:
-                            break
-                
-                for result in soup.find_all('div', class_='result'):
-                    link = result.find('a', class_='result__url')
-                    if link:
-                        url_text = link.get_text(strip=True)
-                        if url_text.startswith('http'):
-                            urls.append(url_text)
-                        elif not url_text.startswith('/'):
-                            urls.append(f"https://{url_text}")
-                        
-                        if len(urls) >= max_results:
-                            break
-                
-                seen = set()
-                unique_urls = []
-                for url in urls:
-                    if url not in seen:
-                        seen.add(url)
-                        unique_urls.append(url)
-                
-                urls = unique_urls[:max_results]
-                
-            except Exception as e:
-                print(f"Search error: {e}")
+                urls = await self.worker_pool.run(parse_search_results, response.text, max_results)
+        
+        except Exception as e:
+            metrics.scrape_failure("search_engine")
+            print(f"Search error: {e}")
         
         return urls
     
-    async def _scrape_page(self, client: httpx.AsyncClient, url: str) -> Dict[str, str]:
+    async def _scrape_page(self, client: httpx.AsyncClient, url: str, revalidate: bool = False) -> Dict[str, str]:
+        with metrics.stage("page_scrape"):
+            return await self._fetch_page(client, url, revalidate)
+    
+    async def _fetch_page(self, client: httpx.AsyncClient, url: str, revalidate: bool = False) -> Dict[str, str]:
         content = {
             'url': url,
             'title': '',
             'content': ''
         }
+        cached = None
         
         try:
-            response = await client.get(url, follow_redirects=True)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            title_tag = soup.find('title')
-            if title_tag:
-                content['title'] = title_tag.get_text(strip=True)
-            
-            for script in soup(['script', 'style', 'meta', 'link', 'noscript']):
-                script.decompose()
-            
-            main_content = None
-            for selector in ['main', 'article', '[role="main"]', '#content', '.content', 'body']:
-                main_content = soup.find(selector)
-                if main_content:
-                    break
+            cached = await self.page_cache.get(url)
+            if cached and not revalidate and self.page_cache.is_fresh(cached):
+                content.update(title=cached['title'], content=cached['content'])
+                return content
             
-            if not main_content:
-                main_content = soup.find('body')
+            headers = {}
+            if cached and cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached and cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
             
-            if main_content:
-                text = main_content.get_text(separator=' ', strip=True)
+            async with client.stream('GET', url, headers=headers, follow_redirects=True) as response:
+                if response.status_code == 304 and cached:
+                    await self.page_cache.mark_revalidated(url)
+                    content.update(title=cached['title'], content=cached['content'])
+                    return content
                 
-                text = re.sub(r'\s+', ' ', text)
-                text = re.sub(r'\n+', ' ', text) 
+                response.raise_for_status()
                 
-                lines = text.split('.')
-                meaningful_lines = [line.strip() for line in lines if len(line.strip()) > 30]
-                text = '. '.join(meaningful_lines)
+                content_type = response.headers.get('content-type', '').lower()
+                if content_type and not any(t in content_type for t in ('html', 'xml', 'text/plain')):
+                    metrics.scrape_failure("content_type")
+                    print(f"Skipping {url}: unsupported content type {content_type}")
+                    return content
                 
-                content['content'] = text[:5000]
+                if settings.HTML_EXTRACTOR == "incremental":
+                    parsed = await self._extract_incremental(response)
+                else:
+                    parsed = await self._extract_buffered(response)
+                if parsed is None:
+                    return content
+                content.update(parsed)
             
+            await self.page_cache.set(
+                url,
+                content['title'],
+                content['content'],
+                response.headers.get('etag'),
+                response.headers.get('last-modified')
+            )
+        
         except httpx.HTTPStatusError as e:
+            metrics.scrape_failure("http_status")
             print(f"HTTP error for {url}: {e}")
+            if e.response.status_code >= 500:
+                self._use_stale(content, cached)
         except Exception as e:
+            metrics.scrape_failure("error")
             print(f"Error scraping {url}: {e}")
+            self._use_stale(content, cached)
         
         return content
+    
+    def _use_stale(self, content: Dict[str, str], cached: Optional[Dict]):
+        if cached and cached['content']:
+            print(f"Serving stored copy of {content['url']}")
+            content.update(title=cached['title'], content=cached['content'])
+    
+    def _is_binary(self, response: httpx.Response, first_chunk: bytes) -> bool:
+        if b'\x00' not in first_chunk[:1024]:
+            return False
+        metrics.scrape_failure("binary")
+        print(f"Skipping {response.url}: binary content")
+        return True
+    
+    async def _extract_incremental(self, response: httpx.Response) -> Optional[Dict[str, str]]:
+        extractor = PageExtractor(response.charset_encoding)
+        size = 0
+        async for chunk in response.aiter_bytes():
+            if not size and self._is_binary(response, chunk):
+                return None
+            size += len(chunk)
+            enough = await self.worker_pool.run_in_thread(extractor.feed, chunk)
+            if enough or size >= settings.SCRAPE_MAX_BYTES:
+                break
+        
+        if not size:
+            return None
+        return await self.worker_pool.run_in_thread(extractor.close)
+    
+    async def _extract_buffered(self, response: httpx.Response) -> Optional[Dict[str, str]]:
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            if not chunks and self._is_binary(response, chunk):
+                return None
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= settings.SCRAPE_MAX_BYTES:
+                break
+        
+        if not chunks:
+            return None
+        html = b''.join(chunks).decode(response.charset_encoding or 'utf-8', errors='replace')
+        return await self.worker_pool.run(parse_page, html)
 
 web_scraper_agent = WebScraperAgent()
\ No newline at end of file
@@ -1,128 +1,324 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
+import json
 import uuid
 
 from app.database import get_db
-from app.database.crud import QueryCRUD, SearchResultCRUD
-from app.models import Query
-from app.agents import (
-    query_validator_agent,
-    similarity_agent,
-    web_scraper_agent,
-    summarizer_agent
+from app.database.connection import SessionLocal
+from app.database.crud import QueryCRUD, SearchResultCRUD, SearchJobCRUD
+from app.agents import query_validator_agent, similarity_agent
+from app.services import embedding_service, gemini_service, metrics, page_cache, response_cache, worker_pool
+from app.services.search_pipeline import (
+    SearchRequest,
+    SearchResponse,
+    search_flight,
+    scrape_flight,
+    run_search,
+    run_search_pipeline,
+    lookup_exact,
+    serve_cached_results,
+    response_from_cache
 )
-from app.services import embedding_service
-from app.utils import normalize_query
+from app.utils import normalize_query, encode_cursor, decode_cursor
+from app.config import settings
 
 router = APIRouter(prefix="/api", tags=["search"])
 
-class SearchRequest(BaseModel):
-    query: str
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 200
 
-class SearchResponse(BaseModel):
-    status: str
-    message: Optional[str] = None
-    from_cache: bool = False
-    summary: Optional[str] = None
-    sources: List[dict] = []
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+    ttl_seconds: Optional[int] = None
 
 @router.post("/search", response_model=SearchResponse)
 async def search(request: SearchRequest, db: Session = Depends(get_db)):
+    return await run_search(db, request)
+
+def _job_payload(job) -> dict:
+    return {
+        "job_id": str(job.id),
+        "status": job.status,
+        "query": job.query,
+        "attempts": job.attempts,
+        "error": job.error,
+        "result": job.result,
+        "created_at": job.created_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+def _parse_job_id(job_id: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid job ID format")
+
+@router.post("/search/jobs", status_code=202)
+async def create_search_job(request: SearchRequest, db: Session = Depends(get_db)):
+    cached_response = await lookup_exact(db, normalize_query(request.query))
+    result = cached_response.dict() if cached_response else None
+    
+    job_id = await worker_pool.run_in_thread(SearchJobCRUD.create_job, db, request.query, request.ttl_seconds, result)
+    return {
+        "job_id": str(job_id),
+        "status": "done" if result else "queued",
+        "result": result
+    }
+
+@router.get("/search/jobs/{job_id}")
+async def get_search_job(job_id: str, db: Session = Depends(get_db)):
+    job = SearchJobCRUD.get_job(db, _parse_job_id(job_id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_payload(job)
+
+@router.get("/search/jobs/{job_id}/events")
+async def stream_search_job(job_id: str):
+    job_uuid = _parse_job_id(job_id)
+    return StreamingResponse(
+        _stream_job_events(job_uuid),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _load_job_payload(job_id: uuid.UUID) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        job = SearchJobCRUD.get_job(db, job_id)
+        return _job_payload(job) if job else None
+    finally:
+        db.close()
+
+async def _stream_job_events(job_id: uuid.UUID) -> AsyncIterator[str]:
+    last_status = None
+    while True:
+        payload = await worker_pool.run_in_thread(_load_job_payload, job_id)
+        if payload is None:
+            yield _sse_event("error", {"message": "Job not found"})
+            return
+        
+        if payload["status"] in ("done", "failed"):
+            yield _sse_event("done", payload)
+            return
+        
+        if payload["status"] != last_status:
+            last_status = payload["status"]
+            yield _sse_event("status", {"status": last_status, "attempts": payload["attempts"]})
+        await asyncio.sleep(settings.JOB_POLL_INTERVAL)
+
+@router.post("/search/batch")
+async def search_batch(request: BatchSearchRequest):
+    if len(request.queries) > settings.BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {settings.BATCH_MAX_QUERIES} queries")
     
-    is_valid, reason = await query_validator_agent.validate_query(request.query)
-    
-    if not is_valid:
-        return SearchResponse(
-            status="invalid",
-            message=f"This is not a valid query. {reason}",
-            sources=[]
-        )
-    
-    normalized = normalize_query(request.query)
-    
-    similar_query_id = await similarity_agent.find_similar_query(db, request.query)
-    
-    if similar_query_id:
-        cached_results = SearchResultCRUD.get_results_by_query_id(db, similar_query_id)
-        if cached_results and cached_results[0].summary:
-            return SearchResponse(
-                status="success",
-                from_cache=True,
-                summary=cached_results[0].summary,
-                sources=[{
-                    "title": r.title,
-                    "url": r.url
-                } for r in cached_results]
-            )
-    
-    embedding = embedding_service.generate_embedding(normalized)
-    
-    new_query = QueryCRUD.create_query(db, request.query, normalized, embedding)
-    
-    scraped_results = await web_scraper_agent.search_and_scrape(request.query)
-    
-    if not scraped_results:
-        return SearchResponse(
-            status="success",
-            message="No results found for your query.",
-            summary="I couldn't find any relevant information for your query. Please try rephrasing or being more specific.",
-            sources=[]
-        )
-    
-    summary = await summarizer_agent.summarize_results(request.query, scraped_results)
-    
-    saved_results = []
-    for result in scraped_results:
-        saved_results.append({
-            'url': result['url'],
-            'title': result['title'],
-            'content': result['content'],
-            'summary': summary
-        })
-    
-    SearchResultCRUD.create_results(db, new_query.id, saved_results)
-    
-    if similar_query_id:
-        similarity_agent.group_similar_queries(db, new_query.id, similar_query_id)
-    
-    return SearchResponse(
-        status="success",
-        from_cache=False,
-        summary=summary,
-        sources=[{
-            "title": r['title'],
-            "url": r['url']
-        } for r in scraped_results]
+    return StreamingResponse(
+        _stream_batch_results(request),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
+async def _stream_batch_results(request: BatchSearchRequest) -> AsyncIterator[str]:
+    groups: Dict[str, List[int]] = {}
+    for i, query in enumerate(request.queries):
+        groups.setdefault(normalize_query(query), []).append(i)
+    
+    def batch_line(normalized: str, response: SearchResponse) -> str:
+        indexes = groups[normalized]
+        return json.dumps({
+            "indexes": indexes,
+            "query": request.queries[indexes[0]],
+            "result": response.dict()
+        }) + "\n"
+    
+    pending = []
+    db = SessionLocal()
+    try:
+        uncached = []
+        for normalized in groups:
+            cached = await response_cache.get_by_normalized_query(normalized)
+            if cached:
+                yield batch_line(normalized, response_from_cache(cached))
+            else:
+                uncached.append(normalized)
+        
+        stored = await worker_pool.run_in_thread(SearchResultCRUD.get_cached_results_by_normalized_queries, db, uncached)
+        for normalized in uncached:
+            rows = stored.get(normalized)
+            cached_response = None
+            if rows and rows[0].summary:
+                cached_response = await serve_cached_results(rows, normalized)
+            
+            if cached_response:
+                metrics.cache_hit("exact_db")
+                yield batch_line(normalized, cached_response)
+            else:
+                metrics.cache_miss("exact_db")
+                pending.append(normalized)
+    finally:
+        db.close()
+    
+    if not pending:
+        return
+    
+    try:
+        embeddings = await embedding_service.generate_embeddings(pending)
+    except Exception as e:
+        print(f"Batch embedding error: {e}")
+        for normalized in pending:
+            yield batch_line(normalized, SearchResponse(status="error", message="Search failed"))
+        return
+    
+    semaphore = asyncio.Semaphore(max(1, settings.BATCH_CONCURRENCY))
+    
+    async def run(normalized: str, embedding: List[float]):
+        search_request = SearchRequest(query=request.queries[groups[normalized][0]], ttl_seconds=request.ttl_seconds)
+        async with semaphore:
+            try:
+                response = await search_flight.run(
+                    normalized, lambda: run_search_pipeline(search_request, normalized, embedding)
+                )
+            except Exception as e:
+                print(f"Batch search error for '{normalized}': {e}")
+                response = SearchResponse(status="error", message="Search failed")
+        return normalized, response
+    
+    tasks = [asyncio.create_task(run(normalized, embedding)) for normalized, embedding in zip(pending, embeddings)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            normalized, response = await next_done
+            yield batch_line(normalized, response)
+    finally:
+        unfinished = [task for task in tasks if not task.done()]
+        for task in unfinished:
+            task.cancel()
+        if unfinished:
+            await asyncio.gather(*unfinished, return_exceptions=True)
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/search/stream")
+async def search_stream(request: SearchRequest):
+    return StreamingResponse(
+        _stream_search_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _stream_search_events(request: SearchRequest) -> AsyncIterator[str]:
+    events: asyncio.Queue = asyncio.Queue()
+    
+    def emit(event: str, data: dict):
+        events.put_nowait((event, data))
+    
+    db = SessionLocal()
+    task = asyncio.create_task(run_search(db, request, emit))
+    task.add_done_callback(lambda _: events.put_nowait(None))
+    try:
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            yield _sse_event(*event)
+        
+        yield _sse_event("done", task.result().dict())
+    except Exception as e:
+        print(f"Search stream error: {e}")
+        yield _sse_event("error", {"message": "Search failed"})
+    finally:
+        if not task.done():
+            task.cancel()
+        db.close()
+
+@router.get("/stats/cache")
+async def get_cache_stats():
+    return response_cache.stats()
+
+@router.get("/stats/pages")
+async def get_page_cache_stats():
+    return page_cache.stats()
+
+@router.get("/stats/coalescing")
+async def get_coalescing_stats():
+    return {
+        "search": search_flight.stats(),
+        "scrape": scrape_flight.stats()
+    }
+
+@router.get("/stats/embedding")
+async def get_embedding_stats():
+    return embedding_service.stats()
+
+@router.get("/stats/llm")
+async def get_llm_stats():
+    return gemini_service.stats()
+
+@router.get("/stats/validation")
+async def get_validation_stats():
+    return query_validator_agent.get_stats()
+
+@router.get("/stats/jobs")
+async def get_job_stats(db: Session = Depends(get_db)):
+    counts = await worker_pool.run_in_thread(SearchJobCRUD.count_by_status, db)
+    return {
+        "total": sum(counts.values()),
+        "by_status": {status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")}
+    }
+
+@router.get("/stats/similarity")
+async def get_similarity_stats():
+    return similarity_agent.get_stats()
+
 @router.get("/search/history")
-async def get_search_history(db: Session = Depends(get_db)):
-    queries = db.query(Query).order_by(Query.created_at.desc()).limit(50).all()
+async def get_search_history(limit: int = HISTORY_PAGE_SIZE, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    before = None
+    if cursor:
+        try:
+            before = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    limit = min(max(limit, 1), HISTORY_MAX_PAGE_SIZE)
+    rows = QueryCRUD.get_history(db, limit + 1, before)
+    page = rows[:limit]
     
     return {
         "queries": [{
             "id": str(q.id),
             "query": q.original_query,
             "created_at": q.created_at.isoformat()
-        } for q in queries]
+        } for q in page],
+        "next_cursor": encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None
     }
 
 @router.get("/search/{query_id}")
-async def get_query_details(query_id: str, db: Session = Depends(get_db)):
+async def get_query_details(query_id: str, include_content: bool = False, db: Session = Depends(get_db)):
     try:
         query_uuid = uuid.UUID(query_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid query ID format")
     
-    query = QueryCRUD.get_query_by_id(db, query_uuid)
-    if not query:
+    rows = QueryCRUD.get_query_details(db, query_uuid, include_content)
+    if not rows:
         raise HTTPException(status_code=404, detail="Query not found")
     
-    results = SearchResultCRUD.get_results_by_query_id(db, query_uuid)
-    
-    summary = results[0].summary if results else None
+    query = rows[0]
+    sources = []
+    for r in rows:
+        if r.result_id is None:
+            continue
+        source = {
+            "title": r.title,
+            "url": r.url,
+            "scraped_at": r.scraped_at.isoformat()
+        }
+        if include_content:
+            source["content"] = r.content
+        sources.append(source)
     
     return {
         "query": {
@@ -131,10 +327,6 @@ async def get_query_details(query_id: str, db: Session = Depends(get_db)):
             "normalized_query": query.normalized_query,
             "created_at": query.created_at.isoformat()
         },
-        "summary": summary,
-        "sources": [{
-            "title": r.title,
-            "url": r.url,
-            "scraped_at": r.scraped_at.isoformat()
-        } for r in results]
+        "summary": query.summary,
+        "sources": sources
     }
\ No newline at end of file
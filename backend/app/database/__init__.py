@@ -1,4 +1,4 @@
 from .connection import get_db, init_db
-from .crud import QueryCRUD, SearchResultCRUD, QueryGroupCRUD
+from .crud import QueryCRUD, SearchResultCRUD, LLMCacheCRUD, PageCacheCRUD, SearchWriteCRUD, SearchJobCRUD
 
-__all__ = ["get_db", "init_db", "QueryCRUD", "SearchResultCRUD", "QueryGroupCRUD"]
\ No newline at end of file
+__all__ = ["get_db", "init_db", "QueryCRUD", "SearchResultCRUD", "LLMCacheCRUD", "PageCacheCRUD", "SearchWriteCRUD", "SearchJobCRUD"]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.orm import sessionmaker, Session
 from app.config import settings
 from app.models import Base
@@ -14,6 +14,38 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+_async_engine = None
+_async_session_factory = None
+
+def _async_database_url(url: str) -> str:
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+def get_async_session_factory():
+    global _async_engine, _async_session_factory
+    
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+        
+        _async_engine = create_async_engine(
+            _async_database_url(settings.DATABASE_URL),
+            pool_pre_ping=True,
+            pool_size=5,
+            max_overflow=10
+        )
+        _async_session_factory = async_sessionmaker(_async_engine, class_=AsyncSession, expire_on_commit=False)
+    return _async_session_factory
+
+async def dispose_async_engine():
+    global _async_engine, _async_session_factory
+    
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_session_factory = None
+
 def get_db():
     db = SessionLocal()
     try:
@@ -21,16 +53,35 @@ def get_db():
     finally:
         db.close()
 
+def _add_missing_columns():
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(
+                    f'ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS "{column.name}" {column_type}'
+                ))
+
 def init_db():
     max_retries = 5
     retry_count = 0
     
     while retry_count < max_retries:
         try:
-            with engine.connect() as conn:
+            with engine.begin() as conn:
                 conn.execute(text("SELECT 1"))
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
             
             Base.metadata.create_all(bind=engine)
+            _add_missing_columns()
+            
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(bind=engine, checkfirst=True)
             print("Database initialized successfully!")
             break
             
@@ -1,36 +1,65 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from app.models import Query, SearchResult, QueryGroup, QueryGroupMapping
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text, func, or_, and_, tuple_
+from sqlalchemy.engine import Row
+from app.config import settings
+from app.models import Query, SearchResult, QueryGroup, QueryGroupMapping, LLMCacheEntry, PageCacheEntry, SearchJob
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import hashlib
 import uuid
 
 class QueryCRUD:
     @staticmethod
-    def create_query(db: Session, original_query: str, normalized_query: str, embedding: List[float]) -> Query:
-        query = Query(
-            original_query=original_query,
-            normalized_query=normalized_query,
-            embedding=embedding
+    def get_nearest_queries(db: Session, embedding: List[float], limit: int) -> List[Row]:
+        distance = Query.embedding.cosine_distance(embedding)
+        db.execute(
+            text("SELECT set_config('hnsw.ef_search', :ef_search, true)"),
+            {"ef_search": str(max(limit, settings.HNSW_EF_SEARCH))}
         )
-        db.add(query)
-        db.commit()
-        db.refresh(query)
-        return query
-    
-    @staticmethod
-    def get_similar_queries(db: Session, embedding: List[float], threshold: float) -> List[Query]:
-        similar = db.query(Query).filter(
-            Query.embedding.cosine_distance(embedding) < (1 - threshold)
-        ).all()
-        return similar
+        return db.query(
+            Query.id,
+            Query.original_query,
+            distance.label("distance")
+        ).filter(
+            Query.embedding.isnot(None)
+        ).order_by(distance).limit(limit).all()
     
     @staticmethod
     def get_query_by_id(db: Session, query_id: uuid.UUID) -> Optional[Query]:
         return db.query(Query).filter(Query.id == query_id).first()
+    
+    @staticmethod
+    def get_history(db: Session, limit: int, before: Optional[Tuple[datetime, uuid.UUID]] = None) -> List[Row]:
+        history = db.query(Query.id, Query.original_query, Query.created_at)
+        if before is not None:
+            history = history.filter(tuple_(Query.created_at, Query.id) < tuple_(*before))
+        return history.order_by(Query.created_at.desc(), Query.id.desc()).limit(limit).all()
+    
+    @staticmethod
+    def get_query_details(db: Session, query_id: uuid.UUID, include_content: bool = False) -> List[Row]:
+        columns = [
+            Query.id,
+            Query.original_query,
+            Query.normalized_query,
+            Query.created_at,
+            func.coalesce(Query.summary, SearchResult.summary).label("summary"),
+            SearchResult.id.label("result_id"),
+            SearchResult.title,
+            SearchResult.url,
+            SearchResult.scraped_at
+        ]
+        if include_content:
+            columns.append(SearchResult.content)
+        
+        return db.query(*columns).outerjoin(
+            SearchResult, SearchResult.query_id == Query.id
+        ).filter(Query.id == query_id).all()
 
 class SearchResultCRUD:
     @staticmethod
-    def create_results(db: Session, query_id: uuid.UUID, results: List[dict]) -> List[SearchResult]:
+    def create_results(db: Session, query_id: uuid.UUID, results: List[dict], commit: bool = True) -> List[SearchResult]:
         search_results = []
         for result in results:
             sr = SearchResult(
@@ -38,41 +67,286 @@ class SearchResultCRUD:
                 url=result['url'],
                 title=result['title'],
                 content=result['content'],
-                summary=result['summary']
+                summary=result.get('summary')
             )
             db.add(sr)
             search_results.append(sr)
         
+        if commit:
+            db.commit()
+        return search_results
+    
+    @staticmethod
+    def replace_results(db: Session, query_id: uuid.UUID, results: List[dict], summary: str) -> List[SearchResult]:
+        db.query(Query).filter(Query.id == query_id).update({Query.summary: summary}, synchronize_session=False)
+        db.query(SearchResult).filter(SearchResult.query_id == query_id).delete(synchronize_session=False)
+        search_results = SearchResultCRUD.create_results(db, query_id, results, commit=False)
         db.commit()
         return search_results
     
     @staticmethod
-    def get_results_by_query_id(db: Session, query_id: uuid.UUID) -> List[SearchResult]:
-        return db.query(SearchResult).filter(SearchResult.query_id == query_id).all()
+    def _cached_results_query(db: Session):
+        return db.query(
+            SearchResult.query_id,
+            SearchResult.title,
+            SearchResult.url,
+            SearchResult.scraped_at,
+            func.coalesce(Query.summary, SearchResult.summary).label("summary"),
+            Query.ttl_seconds
+        ).join(Query, Query.id == SearchResult.query_id)
+    
+    @staticmethod
+    def get_cached_results(db: Session, query_id: uuid.UUID) -> List[Row]:
+        return SearchResultCRUD._cached_results_query(db).filter(SearchResult.query_id == query_id).all()
+    
+    @staticmethod
+    def get_cached_results_by_normalized_query(db: Session, normalized_query: str) -> List[Row]:
+        latest_query_id = db.query(Query.id).join(
+            SearchResult, SearchResult.query_id == Query.id
+        ).filter(
+            func.md5(Query.normalized_query) == func.md5(normalized_query),
+            Query.normalized_query == normalized_query
+        ).order_by(Query.created_at.desc()).limit(1).scalar_subquery()
+        
+        return SearchResultCRUD._cached_results_query(db).filter(SearchResult.query_id == latest_query_id).all()
+    
+    @staticmethod
+    def get_cached_results_by_normalized_queries(db: Session, normalized_queries: List[str]) -> Dict[str, List[Row]]:
+        if not normalized_queries:
+            return {}
+        
+        latest_query_ids = db.query(Query.id).join(
+            SearchResult, SearchResult.query_id == Query.id
+        ).filter(
+            func.md5(Query.normalized_query).in_([hashlib.md5(q.encode()).hexdigest() for q in normalized_queries]),
+            Query.normalized_query.in_(normalized_queries)
+        ).distinct(Query.normalized_query).order_by(
+            Query.normalized_query, Query.created_at.desc()
+        ).subquery()
+        
+        rows = SearchResultCRUD._cached_results_query(db).add_columns(
+            Query.normalized_query
+        ).filter(SearchResult.query_id.in_(select(latest_query_ids.c.id))).all()
+        
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(row.normalized_query, []).append(row)
+        return grouped
 
-class QueryGroupCRUD:
+class SearchWriteCRUD:
     @staticmethod
-    def create_group(db: Session, representative_query_id: uuid.UUID) -> QueryGroup:
-        group = QueryGroup(representative_query_id=representative_query_id)
-        db.add(group)
-        db.commit()
-        db.refresh(group)
-        return group
+    def _group_lookup(similar_query_id: uuid.UUID):
+        return select(QueryGroupMapping.group_id).where(
+            QueryGroupMapping.query_id == similar_query_id
+        ).limit(1)
+    
+    @staticmethod
+    def _build_statements(query_row: dict, results: List[dict], similar_query_id: Optional[uuid.UUID],
+                          existing_group_id: Optional[uuid.UUID]) -> list:
+        statements = [(insert(Query).values(**query_row), None)]
+        
+        if results:
+            statements.append((insert(SearchResult), [
+                {**result, "query_id": query_row["id"]} for result in results
+            ]))
+        
+        if similar_query_id:
+            mappings = [{"query_id": query_row["id"], "group_id": existing_group_id}]
+            if existing_group_id is None:
+                group_id = uuid.uuid4()
+                statements.append((insert(QueryGroup).values(id=group_id, representative_query_id=similar_query_id), None))
+                mappings = [
+                    {"query_id": similar_query_id, "group_id": group_id},
+                    {"query_id": query_row["id"], "group_id": group_id}
+                ]
+            statements.append((insert(QueryGroupMapping).on_conflict_do_nothing(), mappings))
+        
+        return statements
+    
+    @staticmethod
+    def _query_row(original_query: str, normalized_query: str, embedding: List[float], summary: Optional[str],
+                   ttl_seconds: Optional[int]) -> dict:
+        return {
+            "id": uuid.uuid4(),
+            "original_query": original_query,
+            "normalized_query": normalized_query,
+            "embedding": embedding,
+            "summary": summary,
+            "ttl_seconds": ttl_seconds,
+            "created_at": datetime.utcnow()
+        }
+    
+    @staticmethod
+    def save_search(db: Session, original_query: str, normalized_query: str, embedding: List[float],
+                    results: List[dict], summary: Optional[str] = None, similar_query_id: Optional[uuid.UUID] = None,
+                    ttl_seconds: Optional[int] = None) -> uuid.UUID:
+        query_row = SearchWriteCRUD._query_row(original_query, normalized_query, embedding, summary, ttl_seconds)
+        try:
+            existing_group_id = None
+            if similar_query_id:
+                existing_group_id = db.execute(SearchWriteCRUD._group_lookup(similar_query_id)).scalar()
+            
+            for statement, params in SearchWriteCRUD._build_statements(query_row, results, similar_query_id, existing_group_id):
+                db.execute(statement, params)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return query_row["id"]
     
     @staticmethod
-    def add_query_to_group(db: Session, query_id: uuid.UUID, group_id: uuid.UUID):
-        mapping = QueryGroupMapping(query_id=query_id, group_id=group_id)
-        db.add(mapping)
+    async def save_search_async(db: AsyncSession, original_query: str, normalized_query: str, embedding: List[float],
+                                results: List[dict], summary: Optional[str] = None,
+                                similar_query_id: Optional[uuid.UUID] = None,
+                                ttl_seconds: Optional[int] = None) -> uuid.UUID:
+        query_row = SearchWriteCRUD._query_row(original_query, normalized_query, embedding, summary, ttl_seconds)
+        try:
+            existing_group_id = None
+            if similar_query_id:
+                existing_group_id = (await db.execute(SearchWriteCRUD._group_lookup(similar_query_id))).scalar()
+            
+            for statement, params in SearchWriteCRUD._build_statements(query_row, results, similar_query_id, existing_group_id):
+                await db.execute(statement, params)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return query_row["id"]
+
+class LLMCacheCRUD:
+    @staticmethod
+    def get_response(db: Session, key: str) -> Optional[str]:
+        return db.query(LLMCacheEntry.response).filter(
+            LLMCacheEntry.key == key,
+            LLMCacheEntry.expires_at > datetime.utcnow()
+        ).scalar()
+    
+    @staticmethod
+    def set_response(db: Session, key: str, template: str, model: str, response: str, expires_at: datetime):
+        statement = insert(LLMCacheEntry).values(
+            key=key,
+            template=template,
+            model=model,
+            response=response,
+            created_at=datetime.utcnow(),
+            expires_at=expires_at
+        ).on_conflict_do_update(
+            index_elements=[LLMCacheEntry.key],
+            set_={"response": response, "created_at": datetime.utcnow(), "expires_at": expires_at}
+        )
+        db.execute(statement)
         db.commit()
     
     @staticmethod
-    def get_group_by_query_id(db: Session, query_id: uuid.UUID) -> Optional[QueryGroup]:
-        mapping = db.query(QueryGroupMapping).filter(
-            QueryGroupMapping.query_id == query_id
-        ).first()
+    def prune(db: Session, max_entries: int) -> int:
+        expired = db.query(LLMCacheEntry).filter(
+            LLMCacheEntry.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
         
-        if mapping:
-            return db.query(QueryGroup).filter(
-                QueryGroup.id == mapping.group_id
-            ).first()
-        return None
\ No newline at end of file
+        overflow_keys = db.query(LLMCacheEntry.key).order_by(
+            LLMCacheEntry.created_at.desc()
+        ).offset(max_entries).subquery()
+        overflow = db.query(LLMCacheEntry).filter(
+            LLMCacheEntry.key.in_(select(overflow_keys.c.key))
+        ).delete(synchronize_session=False)
+        
+        db.commit()
+        return expired + overflow
+
+class PageCacheCRUD:
+    @staticmethod
+    def get_entry(db: Session, url_hash: str) -> Optional[PageCacheEntry]:
+        return db.query(PageCacheEntry).filter(PageCacheEntry.url_hash == url_hash).first()
+    
+    @staticmethod
+    def upsert_entry(db: Session, url_hash: str, url: str, page: dict):
+        values = {
+            "title": page["title"],
+            "content": page["content"],
+            "etag": page["etag"],
+            "last_modified": page["last_modified"],
+            "fetched_at": datetime.utcnow()
+        }
+        statement = insert(PageCacheEntry).values(url_hash=url_hash, url=url, **values).on_conflict_do_update(
+            index_elements=[PageCacheEntry.url_hash],
+            set_=values
+        )
+        db.execute(statement)
+        db.commit()
+    
+    @staticmethod
+    def touch_entry(db: Session, url_hash: str):
+        db.query(PageCacheEntry).filter(PageCacheEntry.url_hash == url_hash).update(
+            {PageCacheEntry.fetched_at: datetime.utcnow()},
+            synchronize_session=False
+        )
+        db.commit()
+    
+    @staticmethod
+    def prune(db: Session, max_entries: int) -> int:
+        overflow_keys = db.query(PageCacheEntry.url_hash).order_by(
+            PageCacheEntry.fetched_at.desc()
+        ).offset(max_entries).subquery()
+        deleted = db.query(PageCacheEntry).filter(
+            PageCacheEntry.url_hash.in_(select(overflow_keys.c.url_hash))
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+class SearchJobCRUD:
+    @staticmethod
+    def create_job(db: Session, query: str, ttl_seconds: Optional[int] = None, result: Optional[dict] = None) -> uuid.UUID:
+        now = datetime.utcnow()
+        job = SearchJob(query=query, ttl_seconds=ttl_seconds, created_at=now)
+        if result is not None:
+            job.status = "done"
+            job.result = result
+            job.finished_at = now
+        db.add(job)
+        db.commit()
+        return job.id
+    
+    @staticmethod
+    def get_job(db: Session, job_id: uuid.UUID) -> Optional[SearchJob]:
+        return db.query(SearchJob).filter(SearchJob.id == job_id).first()
+    
+    @staticmethod
+    def claim_next(db: Session, stale_after: float, max_attempts: int) -> Optional[dict]:
+        while True:
+            now = datetime.utcnow()
+            job = db.query(SearchJob).filter(or_(
+                SearchJob.status == "queued",
+                and_(SearchJob.status == "running", SearchJob.started_at < now - timedelta(seconds=stale_after))
+            )).order_by(SearchJob.created_at).with_for_update(skip_locked=True).limit(1).first()
+            
+            if job is None:
+                db.rollback()
+                return None
+            
+            if job.attempts >= max_attempts:
+                job.status = "failed"
+                job.error = job.error or "Job did not finish after the maximum number of attempts"
+                job.finished_at = now
+                db.commit()
+                continue
+            
+            job.status = "running"
+            job.attempts += 1
+            job.started_at = now
+            db.commit()
+            return {"id": job.id, "query": job.query, "ttl_seconds": job.ttl_seconds}
+    
+    @staticmethod
+    def count_by_status(db: Session) -> Dict[str, int]:
+        rows = db.query(SearchJob.status, func.count(SearchJob.id)).group_by(SearchJob.status).all()
+        return {status: count for status, count in rows}
+    
+    @staticmethod
+    def finish_job(db: Session, job_id: uuid.UUID, result: Optional[dict] = None, error: Optional[str] = None):
+        db.query(SearchJob).filter(SearchJob.id == job_id).update({
+            SearchJob.status: "failed" if error else "done",
+            SearchJob.result: result,
+            SearchJob.error: error,
+            SearchJob.finished_at: datetime.utcnow()
+        }, synchronize_session=False)
+        db.commit()
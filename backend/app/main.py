@@ -1,12 +1,39 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
 from app.api import router
 from app.database import init_db
+from app.database.connection import dispose_async_engine, engine
+from app.config import settings
+from app.services import embedding_service, gemini_service, http_service, metrics, worker_pool
+from app.services.metrics import event_loop_monitor
+from app.services.profiler import slow_request_profiler
+from app.workers import search_job_worker
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_db()
+    await http_service.start()
+    if settings.EMBEDDING_PRELOAD:
+        await embedding_service.warm_up()
+    event_loop_monitor.start()
+    if settings.JOB_WORKER_IN_API:
+        search_job_worker.start()
+    try:
+        yield
+    finally:
+        await search_job_worker.stop()
+        await event_loop_monitor.stop()
+        await http_service.close()
+        await dispose_async_engine()
+        worker_pool.shutdown()
 
 app = FastAPI(
     title="Web Browser Query Agent",
     description="AI-powered web search agent with query validation and caching",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -17,11 +44,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(router)
+if settings.PROFILER_ENABLED:
+    app.middleware("http")(slow_request_profiler)
 
-@app.on_event("startup")
-async def startup_event():
-    init_db()
+app.include_router(router)
 
 @app.get("/")
 async def root():
@@ -31,6 +57,28 @@ async def root():
         "health": "ok"
     }
 
+def _check_database() -> bool:
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return True
+    except Exception as e:
+        print(f"Health check database error: {e}")
+        return False
+
 @app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+async def health_check(response: Response):
+    database_ok = await worker_pool.run_in_thread(_check_database)
+    breaker_state = gemini_service.breaker.state
+    if not database_ok:
+        response.status_code = 503
+    return {
+        "status": "healthy" if database_ok else "unhealthy",
+        "database": "ok" if database_ok else "unavailable",
+        "gemini_breaker": breaker_state
+    }
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    content, content_type = metrics.render()
+    return Response(content=content, media_type=content_type)
\ No newline at end of file
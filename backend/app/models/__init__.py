@@ -1,4 +1,7 @@
 from .query import Query, QueryGroup, QueryGroupMapping, Base
 from .result import SearchResult
+from .llm_cache import LLMCacheEntry
+from .page_cache import PageCacheEntry
+from .search_job import SearchJob
 
-__all__ = ["Query", "QueryGroup", "QueryGroupMapping", "SearchResult", "Base"]
\ No newline at end of file
+__all__ = ["Query", "QueryGroup", "QueryGroupMapping", "SearchResult", "LLMCacheEntry", "PageCacheEntry", "SearchJob", "Base"]
\ No newline at end of file
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime, Text
+from datetime import datetime
+from .query import Base
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+    
+    key = Column(String(64), primary_key=True)
+    template = Column(String(64), nullable=False)
+    model = Column(String(64), nullable=False)
+    response = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    expires_at = Column(DateTime, nullable=False)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime, Text
+from datetime import datetime
+from .query import Base
+
+class PageCacheEntry(Base):
+    __tablename__ = "page_cache"
+    
+    url_hash = Column(String(64), primary_key=True)
+    url = Column(Text, nullable=False)
+    title = Column(Text)
+    content = Column(Text)
+    etag = Column(Text)
+    last_modified = Column(Text)
+    fetched_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index, Integer, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -10,16 +10,30 @@ Base = declarative_base()
 
 class Query(Base):
     __tablename__ = "queries"
+    __table_args__ = (
+        Index(
+            "ix_queries_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"}
+        ),
+        Index("ix_queries_created_at_id", "created_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     original_query = Column(Text, nullable=False)
     normalized_query = Column(Text, nullable=False)
     embedding = Column(Vector(384))
+    ttl_seconds = Column(Integer)
+    summary = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     results = relationship("SearchResult", back_populates="query")
     group_mappings = relationship("QueryGroupMapping", back_populates="query")
 
+Index("ix_queries_normalized_query_md5", func.md5(Query.normalized_query))
+
 class QueryGroup(Base):
     __tablename__ = "query_groups"
     
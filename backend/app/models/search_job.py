@@ -0,0 +1,22 @@
+from sqlalchemy import Column, DateTime, Text, Index, Integer, String
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+import uuid
+from datetime import datetime
+from .query import Base
+
+class SearchJob(Base):
+    __tablename__ = "search_jobs"
+    __table_args__ = (
+        Index("ix_search_jobs_status_created_at", "status", "created_at"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    query = Column(Text, nullable=False)
+    ttl_seconds = Column(Integer)
+    status = Column(String(16), nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    result = Column(JSONB)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
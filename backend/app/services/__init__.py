@@ -1,4 +1,11 @@
+from .worker_pool import worker_pool
+from . import metrics
+from .llm_cache import llm_cache
 from .gemini_service import gemini_service
 from .embedding_service import embedding_service
+from .http_service import http_service
+from .response_cache import response_cache
+from .single_flight import SingleFlight
+from .page_cache import page_cache
 
-__all__ = ["gemini_service", "embedding_service"]
\ No newline at end of file
+__all__ = ["gemini_service", "embedding_service", "http_service", "worker_pool", "response_cache", "SingleFlight", "llm_cache", "page_cache", "metrics"]
@@ -1,19 +1,157 @@
-from sentence_transformers import SentenceTransformer
 from app.config import settings
-from typing import List
+from .worker_pool import worker_pool
+from . import metrics
+from collections import OrderedDict
+from typing import List, Optional
+import asyncio
+import threading
 import numpy as np
 
+def load_model(backend: str, model_name: str, onnx_file: str = ""):
+    from sentence_transformers import SentenceTransformer
+    
+    if backend == "onnx":
+        model_kwargs = {"file_name": onnx_file} if onnx_file else None
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs=model_kwargs)
+    return SentenceTransformer(model_name)
+
 class EmbeddingService:
     def __init__(self):
-        self.model = SentenceTransformer(settings.EMBEDDING_MODEL)
+        self.backend = settings.EMBEDDING_BACKEND
+        self._model = None
+        self._model_lock = threading.Lock()
+        self.worker_pool = worker_pool
+        self.cache_size = settings.EMBEDDING_CACHE_SIZE
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.batch_size = settings.EMBEDDING_BATCH_SIZE
+        self.batch_wait = settings.EMBEDDING_BATCH_WAIT_MS / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+    
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = load_model(self.backend, settings.EMBEDDING_MODEL, settings.EMBEDDING_ONNX_FILE)
+        return self._model
+    
+    async def warm_up(self):
+        await self.worker_pool.run_in_thread(lambda: self.model)
+    
+    async def generate_embedding(self, text: str) -> List[float]:
+        if self.batch_size <= 1:
+            return (await self.generate_embeddings([text]))[0]
+        
+        self._ensure_batcher()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+    
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        
+        by_text = {}
+        missing = []
+        for text in dict.fromkeys(texts):
+            cached = self._cache_get(text)
+            if cached is None:
+                missing.append(text)
+            else:
+                by_text[text] = cached
+        
+        if missing:
+            with metrics.stage("embedding"):
+                embeddings = await self.worker_pool.run_in_thread(self._encode, missing)
+            for text, embedding in zip(missing, embeddings):
+                by_text[text] = embedding.tolist()
+                self._cache_set(text, by_text[text])
+        
+        return [by_text[text] for text in texts]
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, batch_size=max(self.batch_size, 1))
+    
+    def _cache_get(self, text: str) -> Optional[List[float]]:
+        if self.cache_size <= 0:
+            return None
+        
+        embedding = self._cache.get(text)
+        if embedding is None:
+            self.cache_misses += 1
+            metrics.cache_miss("embedding_cache")
+            return None
+        
+        self._cache.move_to_end(text)
+        self.cache_hits += 1
+        metrics.cache_hit("embedding_cache")
+        return embedding
+    
+    def _cache_set(self, text: str, embedding: List[float]):
+        if self.cache_size <= 0:
+            return
+        
+        self._cache[text] = embedding
+        self._cache.move_to_end(text)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    def stats(self) -> dict:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "backend": self.backend,
+            "model_loaded": self._model is not None,
+            "cache_size": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": self.cache_hits / lookups if lookups else 0.0
+        }
+    
+    def _ensure_batcher(self):
+        if self._batcher is None or self._batcher.done() or self._batcher.get_loop() is not asyncio.get_running_loop():
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.create_task(self._run_batcher(self._queue))
     
-    def generate_embedding(self, text: str) -> List[float]:
-        embedding = self.model.encode(text)
-        return embedding.tolist()
+    async def _run_batcher(self, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.batch_wait
+            
+            while len(batch) < self.batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+            
+            try:
+                embeddings = await self.generate_embeddings([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
     
     def calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         a = np.array(embedding1)
         b = np.array(embedding2)
         return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
 
-embedding_service = EmbeddingService()
\ No newline at end of file
+embedding_service = EmbeddingService()
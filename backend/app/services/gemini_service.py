@@ -1,26 +1,194 @@
-import google.generativeai as genai
+import asyncio
+import random
+import time
 from app.config import settings
-from typing import Optional
+from typing import AsyncIterator, Optional
+from .llm_cache import llm_cache
+from . import metrics
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+    
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+    
+    def before_call(self) -> bool:
+        state = self.state
+        if state == "open" or (state == "half_open" and self.trial_in_flight):
+            raise CircuitOpenError("Gemini circuit breaker is open")
+        if state == "half_open":
+            self.trial_in_flight = True
+            return True
+        return False
+    
+    def end_trial(self):
+        self.trial_in_flight = False
+    
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+    
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+class GeminiBackend:
+    def __init__(self, model_name: str):
+        import google.generativeai as genai
+        from google.api_core import exceptions as google_exceptions
+        
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        self.model = genai.GenerativeModel(model_name)
+        self.retryable_errors = (
+            google_exceptions.ResourceExhausted,
+            google_exceptions.TooManyRequests,
+            google_exceptions.ServiceUnavailable
+        )
+    
+    async def generate(self, prompt: str) -> str:
+        response = await self.model.generate_content_async(prompt)
+        return response.text
+    
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+class StubBackend:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.retryable_errors = ()
+    
+    def _respond(self, prompt: str) -> str:
+        if "query validation agent" in prompt:
+            return "VALID|Stub validation"
+        if "similarity detection agent" in prompt:
+            return "NONE"
+        if "Respond with only YES or NO" in prompt:
+            return "NO"
+        return "This is a stub summary generated without calling Gemini. It combines the scraped sources into a short answer."
+    
+    async def generate(self, prompt: str) -> str:
+        await asyncio.sleep(self.latency)
+        return self._respond(prompt)
+    
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        await asyncio.sleep(self.latency)
+        for word in self._respond(prompt).split(" "):
+            yield word + " "
 
 class GeminiService:
     def __init__(self):
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        if settings.GEMINI_BACKEND == "stub":
+            self.backend = StubBackend(settings.GEMINI_STUB_LATENCY)
+        else:
+            self.backend = GeminiBackend(settings.GEMINI_MODEL)
+        
+        self.semaphore = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+        self.timeout = settings.GEMINI_TIMEOUT
+        self.max_retries = settings.GEMINI_MAX_RETRIES
+        self.retry_base_delay = settings.GEMINI_RETRY_BASE_DELAY
+        self.breaker = CircuitBreaker(settings.GEMINI_BREAKER_THRESHOLD, settings.GEMINI_BREAKER_COOLDOWN)
+        self.model_name = settings.GEMINI_MODEL if settings.GEMINI_BACKEND != "stub" else "stub"
+        self.cache = llm_cache
+    
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, self.retry_base_delay * (2 ** attempt))
+    
+    async def generate_content(self, prompt: str, cache_template: Optional[str] = None,
+                               cache_input: Optional[str] = None, cache_ttl: Optional[float] = None) -> Optional[str]:
+        use_cache = cache_template is not None and cache_input is not None
+        if use_cache:
+            cached = await self.cache.get(cache_template, self.model_name, cache_input)
+            if cached is not None:
+                return cached
+        
+        text = await self._generate(prompt)
+        
+        if use_cache and text:
+            await self.cache.set(cache_template, self.model_name, cache_input, text, cache_ttl)
+        return text
     
-    async def generate_content(self, prompt: str) -> Optional[str]:
+    async def _generate(self, prompt: str) -> Optional[str]:
+        is_trial = False
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
+            is_trial = self.breaker.before_call()
+            
+            for attempt in range(self.max_retries + 1):
+                try:
+                    async with self.semaphore:
+                        text = await asyncio.wait_for(self.backend.generate(prompt), timeout=self.timeout)
+                    self.breaker.record_success()
+                    metrics.llm_call("success")
+                    return text
+                except self.backend.retryable_errors as e:
+                    metrics.llm_call("rate_limited")
+                    if attempt == self.max_retries:
+                        raise
+                    print(f"Gemini rate limited, retrying ({attempt + 1}/{self.max_retries}): {e}")
+                    await asyncio.sleep(self._backoff(attempt))
+        except CircuitOpenError as e:
+            metrics.llm_call("circuit_open")
             print(f"Error generating content: {e}")
-            try:
-                models = genai.list_models()
-                print("Available models:")
-                for model in models:
-                    if 'generateContent' in model.supported_generation_methods:
-                        print(f"  - {model.name}")
-            except:
-                pass
-            return None
+        except Exception as e:
+            self.breaker.record_failure()
+            metrics.llm_call("error")
+            print(f"Error generating content: {e!r}")
+        finally:
+            if is_trial:
+                self.breaker.end_trial()
+        return None
+    
+    async def generate_content_stream(self, prompt: str) -> AsyncIterator[str]:
+        is_trial = self.breaker.before_call()
+        
+        try:
+            async with self.semaphore:
+                stream = self.backend.stream(prompt)
+                
+                async def first_token() -> Optional[str]:
+                    async for token in stream:
+                        return token
+                    return None
+                
+                try:
+                    first = await asyncio.wait_for(first_token(), timeout=self.timeout)
+                    if first is not None:
+                        yield first
+                        async for token in stream:
+                            yield token
+                except Exception:
+                    self.breaker.record_failure()
+                    metrics.llm_call("error")
+                    raise
+                else:
+                    self.breaker.record_success()
+                    metrics.llm_call("success")
+        finally:
+            if is_trial:
+                self.breaker.end_trial()
+    
+    def stats(self) -> dict:
+        return {
+            "backend": settings.GEMINI_BACKEND,
+            "breaker_state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "response_cache": self.cache.stats()
+        }
 
-gemini_service = GeminiService()
\ No newline at end of file
+gemini_service = GeminiService()
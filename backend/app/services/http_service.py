@@ -0,0 +1,41 @@
+import httpx
+from app.config import settings
+from typing import Optional
+
+class HttpService:
+    def __init__(self):
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+    
+    def _create_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        )
+        return httpx.AsyncClient(
+            timeout=settings.HTTP_TIMEOUT,
+            limits=limits,
+            http2=settings.HTTP2_ENABLED,
+            headers=self.headers,
+            follow_redirects=True
+        )
+    
+    async def start(self):
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+    
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+http_service = HttpService()
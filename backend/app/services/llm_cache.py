@@ -0,0 +1,89 @@
+import hashlib
+from datetime import datetime, timedelta
+from app.config import settings
+from app.database.connection import SessionLocal
+from app.database.crud import LLMCacheCRUD
+from typing import Optional
+from .worker_pool import worker_pool
+from . import metrics
+
+class LLMCache:
+    def __init__(self):
+        self.enabled = settings.LLM_CACHE_ENABLED
+        self.ttl = settings.LLM_CACHE_TTL
+        self.max_entries = settings.LLM_CACHE_MAX_ENTRIES
+        self.prune_every = settings.LLM_CACHE_PRUNE_EVERY
+        self.worker_pool = worker_pool
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+    
+    @staticmethod
+    def make_key(template: str, model: str, cache_input: str) -> str:
+        return hashlib.sha256(f"{template}\0{model}\0{cache_input}".encode("utf-8")).hexdigest()
+    
+    def _get(self, key: str) -> Optional[str]:
+        db = SessionLocal()
+        try:
+            return LLMCacheCRUD.get_response(db, key)
+        finally:
+            db.close()
+    
+    def _set(self, key: str, template: str, model: str, response: str, ttl: float, prune: bool):
+        db = SessionLocal()
+        try:
+            expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+            LLMCacheCRUD.set_response(db, key, template, model, response, expires_at)
+            if prune:
+                LLMCacheCRUD.prune(db, self.max_entries)
+        finally:
+            db.close()
+    
+    async def get(self, template: str, model: str, cache_input: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        
+        try:
+            response = await self.worker_pool.run_in_thread(self._get, self.make_key(template, model, cache_input))
+        except Exception as e:
+            print(f"LLM cache read error: {e}")
+            response = None
+        
+        if response is None:
+            self.misses += 1
+            metrics.cache_miss("llm_cache")
+        else:
+            self.hits += 1
+            metrics.cache_hit("llm_cache")
+        return response
+    
+    async def set(self, template: str, model: str, cache_input: str, response: str, ttl: Optional[float] = None):
+        if not self.enabled:
+            return
+        
+        self.writes += 1
+        prune = self.writes % self.prune_every == 0
+        try:
+            await self.worker_pool.run_in_thread(
+                self._set,
+                self.make_key(template, model, cache_input),
+                template,
+                model,
+                response,
+                ttl if ttl is not None else self.ttl,
+                prune
+            )
+        except Exception as e:
+            print(f"LLM cache write error: {e}")
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+llm_cache = LLMCache()
@@ -0,0 +1,85 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from app.database.connection import engine
+from typing import Callable, List, Optional
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_LATENCY = Histogram(
+    "search_stage_seconds",
+    "Latency of each search pipeline stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS
+)
+CACHE_HITS = Counter("search_cache_hits_total", "Cache hits by tier", ["tier"])
+CACHE_MISSES = Counter("search_cache_misses_total", "Cache misses by tier", ["tier"])
+LLM_CALLS = Counter("llm_calls_total", "Gemini calls by outcome", ["outcome"])
+SCRAPE_FAILURES = Counter("scrape_failures_total", "Failed page scrapes by reason", ["reason"])
+EVENT_LOOP_LAG = Gauge("event_loop_lag_seconds", "Delay of the most recent event loop tick")
+
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Database connections currently in use")
+DB_POOL_CHECKED_OUT.set_function(lambda: engine.pool.checkedout())
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured database pool size")
+DB_POOL_SIZE.set_function(lambda: engine.pool.size())
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Database connections opened beyond the pool size")
+DB_POOL_OVERFLOW.set_function(lambda: max(engine.pool.overflow(), 0))
+
+_stage_observers: List[Callable[[str, float], None]] = []
+
+def add_stage_observer(callback: Callable[[str, float], None]):
+    _stage_observers.append(callback)
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.labels(stage=name).observe(elapsed)
+        for callback in _stage_observers:
+            callback(name, elapsed)
+
+def cache_hit(tier: str):
+    CACHE_HITS.labels(tier=tier).inc()
+
+def cache_miss(tier: str):
+    CACHE_MISSES.labels(tier=tier).inc()
+
+def llm_call(outcome: str):
+    LLM_CALLS.labels(outcome=outcome).inc()
+
+def scrape_failure(reason: str, count: int = 1):
+    SCRAPE_FAILURES.labels(reason=reason).inc(count)
+
+def render() -> tuple:
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+class EventLoopMonitor:
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.set(max(loop.time() - start - self.interval, 0.0))
+    
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+event_loop_monitor = EventLoopMonitor()
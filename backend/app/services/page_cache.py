@@ -0,0 +1,114 @@
+import hashlib
+from datetime import datetime, timedelta
+from app.config import settings
+from app.database.connection import SessionLocal
+from app.database.crud import PageCacheCRUD
+from typing import Dict, Optional
+from .worker_pool import worker_pool
+from . import metrics
+
+class PageCache:
+    def __init__(self):
+        self.enabled = settings.PAGE_CACHE_ENABLED
+        self.ttl = settings.PAGE_CACHE_TTL
+        self.max_entries = settings.PAGE_CACHE_MAX_ENTRIES
+        self.prune_every = settings.PAGE_CACHE_PRUNE_EVERY
+        self.worker_pool = worker_pool
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.writes = 0
+    
+    @staticmethod
+    def url_hash(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+    
+    def _get(self, url: str) -> Optional[Dict]:
+        db = SessionLocal()
+        try:
+            entry = PageCacheCRUD.get_entry(db, self.url_hash(url))
+            if entry is None:
+                return None
+            return {
+                "title": entry.title or "",
+                "content": entry.content or "",
+                "etag": entry.etag,
+                "last_modified": entry.last_modified,
+                "fetched_at": entry.fetched_at
+            }
+        finally:
+            db.close()
+    
+    def _set(self, url: str, page: Dict, prune: bool):
+        db = SessionLocal()
+        try:
+            PageCacheCRUD.upsert_entry(db, self.url_hash(url), url, page)
+            if prune:
+                PageCacheCRUD.prune(db, self.max_entries)
+        finally:
+            db.close()
+    
+    def _touch(self, url: str):
+        db = SessionLocal()
+        try:
+            PageCacheCRUD.touch_entry(db, self.url_hash(url))
+        finally:
+            db.close()
+    
+    def is_fresh(self, entry: Dict) -> bool:
+        return datetime.utcnow() - entry["fetched_at"] < timedelta(seconds=self.ttl)
+    
+    async def get(self, url: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        
+        try:
+            entry = await self.worker_pool.run_in_thread(self._get, url)
+        except Exception as e:
+            print(f"Page cache read error: {e}")
+            return None
+        
+        if entry is None:
+            self.misses += 1
+            metrics.cache_miss("page_cache")
+        elif self.is_fresh(entry):
+            self.fresh_hits += 1
+            metrics.cache_hit("page_cache")
+        return entry
+    
+    async def set(self, url: str, title: str, content: str, etag: Optional[str], last_modified: Optional[str]):
+        if not self.enabled or not content:
+            return
+        
+        self.writes += 1
+        page = {
+            "title": title,
+            "content": content,
+            "etag": etag,
+            "last_modified": last_modified
+        }
+        try:
+            await self.worker_pool.run_in_thread(self._set, url, page, self.writes % self.prune_every == 0)
+        except Exception as e:
+            print(f"Page cache write error: {e}")
+    
+    async def mark_revalidated(self, url: str):
+        self.revalidated += 1
+        metrics.cache_hit("page_cache_revalidated")
+        try:
+            await self.worker_pool.run_in_thread(self._touch, url)
+        except Exception as e:
+            print(f"Page cache write error: {e}")
+    
+    def stats(self) -> dict:
+        lookups = self.fresh_hits + self.revalidated + self.misses
+        return {
+            "enabled": self.enabled,
+            "fresh_hits": self.fresh_hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": (self.fresh_hits + self.revalidated) / lookups if lookups else 0.0
+        }
+
+page_cache = PageCache()
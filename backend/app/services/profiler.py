@@ -0,0 +1,47 @@
+import os
+import random
+import time
+from datetime import datetime
+from fastapi import Request
+from app.config import settings
+
+class SlowRequestProfiler:
+    def __init__(self):
+        self.enabled = settings.PROFILER_ENABLED
+        self.sample_rate = settings.PROFILER_SAMPLE_RATE
+        self.slow_threshold = settings.PROFILER_SLOW_THRESHOLD
+        self.output_dir = settings.PROFILER_OUTPUT_DIR
+    
+    def _should_profile(self, request: Request) -> bool:
+        if not self.enabled:
+            return False
+        if request.headers.get("x-profile") == "1" or request.query_params.get("profile") == "1":
+            return True
+        return random.random() < self.sample_rate
+    
+    async def __call__(self, request: Request, call_next):
+        if not self._should_profile(request):
+            return await call_next(request)
+        
+        from pyinstrument import Profiler
+        
+        profiler = Profiler(async_mode="enabled")
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            return await call_next(request)
+        finally:
+            profiler.stop()
+            elapsed = time.perf_counter() - start
+            if elapsed >= self.slow_threshold:
+                self._write_report(request, profiler, elapsed)
+    
+    def _write_report(self, request: Request, profiler, elapsed: float):
+        os.makedirs(self.output_dir, exist_ok=True)
+        name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{request.url.path.strip('/').replace('/', '_') or 'root'}.html"
+        path = os.path.join(self.output_dir, name)
+        with open(path, "w") as f:
+            f.write(profiler.output_html())
+        print(f"Slow request {request.method} {request.url.path} took {elapsed:.2f}s, profile written to {path}")
+
+slow_request_profiler = SlowRequestProfiler()
@@ -0,0 +1,144 @@
+import json
+import time
+from collections import OrderedDict
+from app.config import settings
+from . import metrics
+from typing import Any, Optional
+
+class MemoryCacheBackend:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+    
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+    
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+class RedisCacheBackend:
+    def __init__(self, url: str, ttl: float, prefix: str = "query-agent:response:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package") from e
+        
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+    
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+    
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expiry = ttl if ttl is not None else self.ttl
+        await self.client.set(self.prefix + key, json.dumps(value), px=int(expiry * 1000))
+    
+    async def delete(self, key: str):
+        await self.client.delete(self.prefix + key)
+    
+    def stats(self) -> dict:
+        return {"backend": "redis"}
+
+class ResponseCache:
+    def __init__(self):
+        self.enabled = settings.RESPONSE_CACHE_BACKEND != "none"
+        self.backend = self._create_backend() if self.enabled else None
+        self.hits = 0
+        self.misses = 0
+    
+    def _create_backend(self):
+        if settings.RESPONSE_CACHE_BACKEND == "redis":
+            return RedisCacheBackend(settings.REDIS_URL, settings.RESPONSE_CACHE_TTL)
+        return MemoryCacheBackend(settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_TTL)
+    
+    @staticmethod
+    def _query_key(query_id) -> str:
+        return f"query:{query_id}"
+    
+    @staticmethod
+    def _normalized_key(normalized_query: str) -> str:
+        return f"normalized:{normalized_query}"
+    
+    async def _get(self, key: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            print(f"Response cache error: {e}")
+            value = None
+        
+        if value is None:
+            self.misses += 1
+            metrics.cache_miss("response_cache")
+        else:
+            self.hits += 1
+            metrics.cache_hit("response_cache")
+        return value
+    
+    async def get_by_query_id(self, query_id) -> Optional[dict]:
+        return await self._get(self._query_key(query_id))
+    
+    async def get_by_normalized_query(self, normalized_query: str) -> Optional[dict]:
+        return await self._get(self._normalized_key(normalized_query))
+    
+    async def set(self, payload: dict, query_id=None, normalized_query: Optional[str] = None, ttl: Optional[float] = None):
+        if not self.enabled or (ttl is not None and ttl <= 0):
+            return
+        
+        try:
+            if query_id is not None:
+                await self.backend.set(self._query_key(query_id), payload, ttl)
+            if normalized_query:
+                await self.backend.set(self._normalized_key(normalized_query), payload, ttl)
+        except Exception as e:
+            print(f"Response cache error: {e}")
+    
+    def stats(self) -> dict:
+        if not self.enabled:
+            return {"backend": "none"}
+        
+        lookups = self.hits + self.misses
+        return {
+            **self.backend.stats(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+response_cache = ResponseCache()
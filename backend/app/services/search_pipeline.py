@@ -0,0 +1,219 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.engine import Row
+from pydantic import BaseModel
+from typing import Callable, List, Optional
+import asyncio
+import uuid
+
+from app.database.connection import SessionLocal, get_async_session_factory
+from app.database.crud import SearchResultCRUD, SearchWriteCRUD
+from app.agents import (
+    query_validator_agent,
+    similarity_agent,
+    web_scraper_agent,
+    summarizer_agent,
+    refresh_agent
+)
+from app.services import embedding_service, metrics, response_cache, worker_pool, SingleFlight
+from app.utils import normalize_query, StageTimer
+from app.config import settings
+
+search_flight = SingleFlight()
+scrape_flight = SingleFlight(similarity_threshold=settings.SINGLE_FLIGHT_SIMILARITY)
+
+class SearchRequest(BaseModel):
+    query: str
+    ttl_seconds: Optional[int] = None
+
+class SearchResponse(BaseModel):
+    status: str
+    message: Optional[str] = None
+    from_cache: bool = False
+    summary: Optional[str] = None
+    sources: List[dict] = []
+
+def _cached_payload(results: List[Row]) -> dict:
+    return {
+        "summary": results[0].summary,
+        "sources": [{
+            "title": r.title,
+            "url": r.url
+        } for r in results]
+    }
+
+def response_from_cache(payload: dict) -> SearchResponse:
+    return SearchResponse(status="success", from_cache=True, **payload)
+
+async def serve_cached_results(results: List[Row], normalized: Optional[str] = None) -> Optional[SearchResponse]:
+    query_id = results[0].query_id
+    payload = _cached_payload(results)
+    remaining = refresh_agent.remaining_ttl(results)
+    
+    if remaining is not None and remaining <= 0:
+        if not refresh_agent.handle_stale(query_id):
+            return None
+        return response_from_cache(payload)
+    
+    cache_ttl = settings.RESPONSE_CACHE_TTL if remaining is None else min(settings.RESPONSE_CACHE_TTL, remaining)
+    await response_cache.set(payload, query_id=query_id, normalized_query=normalized, ttl=cache_ttl)
+    return response_from_cache(payload)
+
+async def lookup_exact(db: Session, normalized: str) -> Optional[SearchResponse]:
+    cached = await response_cache.get_by_normalized_query(normalized)
+    if cached:
+        return response_from_cache(cached)
+    
+    exact_results = SearchResultCRUD.get_cached_results_by_normalized_query(db, normalized)
+    if exact_results and exact_results[0].summary:
+        response = await serve_cached_results(exact_results, normalized)
+        if response:
+            metrics.cache_hit("exact_db")
+            return response
+    metrics.cache_miss("exact_db")
+    return None
+
+async def _lookup_similar(db: Session, similar_query_id: uuid.UUID, normalized: str) -> Optional[SearchResponse]:
+    cached = await response_cache.get_by_query_id(similar_query_id)
+    if cached:
+        return response_from_cache(cached)
+    
+    cached_results = SearchResultCRUD.get_cached_results(db, similar_query_id)
+    if cached_results and cached_results[0].summary:
+        response = await serve_cached_results(cached_results, normalized)
+        if response:
+            metrics.cache_hit("similarity")
+            return response
+    metrics.cache_miss("similarity")
+    return None
+
+def _invalid_response(reason: str) -> SearchResponse:
+    return SearchResponse(
+        status="invalid",
+        message=f"This is not a valid query. {reason}",
+        sources=[]
+    )
+
+def _no_results_response() -> SearchResponse:
+    return SearchResponse(
+        status="success",
+        message="No results found for your query.",
+        summary="I couldn't find any relevant information for your query. Please try rephrasing or being more specific.",
+        sources=[]
+    )
+
+async def _save_results(db: Session, request: SearchRequest, normalized: str, embedding: List[float],
+                        scraped_results: List[dict], summary: str, similar_query_id: Optional[uuid.UUID]) -> dict:
+    saved_results = []
+    for result in scraped_results:
+        saved_results.append({
+            'url': result['url'],
+            'title': result['title'],
+            'content': result['content']
+        })
+    
+    write_args = (request.query, normalized, embedding, saved_results, summary, similar_query_id, request.ttl_seconds)
+    with metrics.stage("db_write"):
+        if settings.DATABASE_ASYNC:
+            async with get_async_session_factory()() as async_db:
+                query_id = await SearchWriteCRUD.save_search_async(async_db, *write_args)
+        else:
+            query_id = await worker_pool.run_in_thread(SearchWriteCRUD.save_search, db, *write_args)
+    
+    payload = {
+        "summary": summary,
+        "sources": [{
+            "title": r['title'],
+            "url": r['url']
+        } for r in scraped_results]
+    }
+    result_ttl = refresh_agent.result_ttl(request.ttl_seconds)
+    cache_ttl = settings.RESPONSE_CACHE_TTL if result_ttl is None else min(settings.RESPONSE_CACHE_TTL, result_ttl)
+    await response_cache.set(payload, query_id=query_id, normalized_query=normalized, ttl=cache_ttl)
+    return payload
+
+async def run_search(db: Session, request: SearchRequest,
+                     emit: Optional[Callable[[str, dict], None]] = None) -> SearchResponse:
+    normalized = normalize_query(request.query)
+    
+    cached_response = await lookup_exact(db, normalized)
+    if cached_response:
+        if emit:
+            emit("cache", {"hit": True})
+        return cached_response
+    
+    db.close()
+    return await search_flight.run(normalized, lambda: run_search_pipeline(request, normalized, emit=emit))
+
+async def run_search_pipeline(request: SearchRequest, normalized: str, embedding: Optional[List[float]] = None,
+                              emit: Optional[Callable[[str, dict], None]] = None) -> SearchResponse:
+    def emit_source(page: dict):
+        emit("source", {"title": page['title'], "url": page['url']})
+    
+    def emit_token(token: str):
+        emit("summary", {"text": token})
+    
+    timer = StageTimer()
+    parallel = settings.PIPELINE_MODE == "parallel"
+    speculative = []
+    db = SessionLocal()
+    try:
+        if parallel:
+            if embedding is None:
+                embedding_task = asyncio.create_task(timer.time("embedding", embedding_service.generate_embedding(normalized)))
+                speculative.append(embedding_task)
+            urls_task = asyncio.create_task(timer.time("search_engine", web_scraper_agent.get_result_urls(request.query)))
+            speculative.append(urls_task)
+        
+        is_valid, reason = await timer.time("validation", query_validator_agent.validate_query(request.query))
+        if emit:
+            emit("validation", {"valid": is_valid, "reason": reason})
+        
+        if not is_valid:
+            return _invalid_response(reason)
+        
+        if embedding is None:
+            if parallel:
+                embedding = await embedding_task
+            else:
+                embedding = await timer.time("embedding", embedding_service.generate_embedding(normalized))
+        
+        similar_query_id = await timer.time("similarity", similarity_agent.find_similar_query(db, request.query, embedding))
+        
+        if similar_query_id:
+            cached_response = await _lookup_similar(db, similar_query_id, normalized)
+            if cached_response:
+                if emit:
+                    emit("cache", {"hit": True})
+                return cached_response
+        
+        db.close()
+        if emit:
+            emit("cache", {"hit": False})
+        
+        async def scrape_and_summarize():
+            if parallel:
+                urls = await urls_task
+            else:
+                urls = await timer.time("search_engine", web_scraper_agent.get_result_urls(request.query))
+            scraped = await timer.time("scrape", web_scraper_agent.scrape_urls(urls, on_page=emit_source if emit else None))
+            if not scraped:
+                return scraped, None
+            summary = summarizer_agent.summarize_results(request.query, scraped, on_token=emit_token if emit else None)
+            return scraped, await timer.time("summarize", summary)
+        
+        scraped_results, summary = await scrape_flight.run(normalized, scrape_and_summarize, embedding=embedding)
+        
+        if not scraped_results:
+            return _no_results_response()
+        
+        with timer.stage("db_write"):
+            payload = await _save_results(db, request, normalized, embedding, scraped_results, summary, similar_query_id)
+        
+        return SearchResponse(status="success", from_cache=False, **payload)
+    finally:
+        for task in speculative:
+            if not task.done():
+                task.cancel()
+        db.close()
+        if settings.PIPELINE_LOG_TIMINGS:
+            print(f"Search timings for '{normalized}': {timer.as_dict()}")
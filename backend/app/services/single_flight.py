@@ -0,0 +1,61 @@
+import asyncio
+import numpy as np
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+class SingleFlight:
+    def __init__(self, similarity_threshold: float = 0.0):
+        self.similarity_threshold = similarity_threshold
+        self._calls: Dict[str, Tuple[asyncio.Task, Optional[np.ndarray]]] = {}
+        self.leaders = 0
+        self.exact_followers = 0
+        self.neighbour_followers = 0
+    
+    def _find_neighbour(self, embedding: List[float]) -> Optional[asyncio.Task]:
+        if self.similarity_threshold <= 0:
+            return None
+        
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        
+        best_task, best_similarity = None, self.similarity_threshold
+        for task, other in self._calls.values():
+            if other is None or task.done():
+                continue
+            similarity = float(np.dot(vector, other) / (norm * np.linalg.norm(other)))
+            if similarity >= best_similarity:
+                best_task, best_similarity = task, similarity
+        return best_task
+    
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]], embedding: Optional[List[float]] = None) -> Any:
+        entry = self._calls.get(key)
+        if entry is not None:
+            self.exact_followers += 1
+            return await asyncio.shield(entry[0])
+        
+        if embedding is not None:
+            neighbour = self._find_neighbour(embedding)
+            if neighbour is not None:
+                self.neighbour_followers += 1
+                return await asyncio.shield(neighbour)
+        
+        task = asyncio.create_task(factory())
+        vector = np.asarray(embedding, dtype=np.float32) if embedding is not None else None
+        self._calls[key] = (task, vector)
+        self.leaders += 1
+        
+        def forget(done: asyncio.Task):
+            if self._calls.get(key, (None,))[0] is done:
+                del self._calls[key]
+        
+        task.add_done_callback(forget)
+        return await asyncio.shield(task)
+    
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "exact_followers": self.exact_followers,
+            "neighbour_followers": self.neighbour_followers
+        }
@@ -0,0 +1,48 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from app.config import settings
+from typing import Any, Callable, Optional
+
+class WorkerPool:
+    def __init__(self):
+        self.mode = settings.WORKER_POOL_MODE
+        self.size = settings.WORKER_POOL_SIZE or None
+        self._executor: Optional[Executor] = None
+        self._thread_executor: Optional[ThreadPoolExecutor] = None
+    
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.size)
+            else:
+                self._executor = self.thread_executor
+        return self._executor
+    
+    @property
+    def thread_executor(self) -> ThreadPoolExecutor:
+        if self._thread_executor is None:
+            self._thread_executor = ThreadPoolExecutor(
+                max_workers=self.size,
+                thread_name_prefix="worker-pool"
+            )
+        return self._thread_executor
+    
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+    
+    async def run_in_thread(self, func: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.thread_executor, partial(func, *args, **kwargs))
+    
+    def shutdown(self):
+        if self._executor is not None and self._executor is not self._thread_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._thread_executor is not None:
+            self._thread_executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._thread_executor = None
+
+worker_pool = WorkerPool()
@@ -1,3 +1,5 @@
-from .helpers import normalize_query, format_response
+from .helpers import normalize_query, encode_cursor, decode_cursor
+from .html_parser import PageExtractor, parse_page, parse_page_bytes, parse_search_results
+from .timing import StageTimer
 
-__all__ = ["normalize_query", "format_response"]
\ No newline at end of file
+__all__ = ["normalize_query", "encode_cursor", "decode_cursor", "PageExtractor", "parse_page", "parse_page_bytes", "parse_search_results", "StageTimer"]
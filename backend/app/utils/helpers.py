@@ -1,5 +1,8 @@
+import base64
 import re
-from typing import List, Dict
+import uuid
+from datetime import datetime
+from typing import Tuple
 
 def normalize_query(query: str) -> str:
     normalized = query.lower()
@@ -10,16 +13,11 @@ def normalize_query(query: str) -> str:
     
     return normalized.strip()
 
-def format_response(results: list, from_cache: bool = False) -> dict:
-    return {
-        "status": "success",
-        "from_cache": from_cache,
-        "result_count": len(results),
-        "results": [
-            {
-                "title": r.title,
-                "url": r.url,
-                "summary": r.summary
-            } for r in results
-        ]
-    }
\ No newline at end of file
+def encode_cursor(created_at: datetime, query_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{query_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    created_at, query_id = raw.split("|", 1)
+    return datetime.fromisoformat(created_at), uuid.UUID(query_id)
@@ -0,0 +1,190 @@
+from bs4 import BeautifulSoup
+from typing import List, Dict, Iterable, Optional
+import codecs
+import re
+
+try:
+    from lxml import etree
+    HTML_PARSER = 'lxml'
+except ImportError:
+    etree = None
+    HTML_PARSER = 'html.parser'
+
+MAX_CONTENT_CHARS = 5000
+SKIP_TAGS = {'script', 'style', 'meta', 'link', 'noscript', 'template', 'svg'}
+MAIN_TAGS = {'main', 'article'}
+
+def parse_search_results(html: str, max_results: int) -> List[str]:
+    urls = []
+    soup = BeautifulSoup(html, HTML_PARSER)
+    
+    for link in soup.find_all('a', class_='result__a'):
+        href = link.get('href')
+        if href and href.startswith('http') and 'duckduckgo.com' not in href:
+            urls.append(href)
+            if len(urls) >= max_results:
+                break
+    
+    for result in soup.find_all('div', class_='result'):
+        link = result.find('a', class_='result__url')
+        if link:
+            url_text = link.get_text(strip=True)
+            if url_text.startswith('http'):
+                urls.append(url_text)
+            elif not url_text.startswith('/'):
+                urls.append(f"https://{url_text}")
+            
+            if len(urls) >= max_results:
+                break
+    
+    seen = set()
+    unique_urls = []
+    for url in urls:
+        if url not in seen:
+            seen.add(url)
+            unique_urls.append(url)
+    
+    return unique_urls[:max_results]
+
+def parse_page(html: str) -> Dict[str, str]:
+    content = {
+        'title': '',
+        'content': ''
+    }
+    
+    soup = BeautifulSoup(html, HTML_PARSER)
+    
+    title_tag = soup.find('title')
+    if title_tag:
+        content['title'] = title_tag.get_text(strip=True)
+    
+    for script in soup(['script', 'style', 'meta', 'link', 'noscript']):
+        script.decompose()
+    
+    main_content = None
+    for selector in ['main', 'article', '[role="main"]', '#content', '.content', 'body']:
+        main_content = soup.find(selector)
+        if main_content:
+            break
+    
+    if not main_content:
+        main_content = soup.find('body')
+    
+    if main_content:
+        text = main_content.get_text(separator=' ', strip=True)
+        
+        content['content'] = clean_text(text)[:MAX_CONTENT_CHARS]
+    
+    return content
+
+def clean_text(text: str) -> str:
+    text = re.sub(r'\s+', ' ', text)
+    
+    lines = text.split('.')
+    meaningful_lines = [line.strip() for line in lines if len(line.strip()) > 30]
+    return '. '.join(meaningful_lines)
+
+class _TextCollector:
+    def __init__(self):
+        self.stack = []
+        self.skip_depth = 0
+        self.main_depth = 0
+        self.in_title = False
+        self.title_seen = False
+        self.title_parts = []
+        self.main_parts = []
+        self.body_parts = []
+        self.main_chars = 0
+        self.body_chars = 0
+    
+    def start(self, tag, attrib):
+        tag = tag.lower() if isinstance(tag, str) else ''
+        is_title = tag == 'title' and not self.title_seen and self.skip_depth == 0
+        is_skip = tag in SKIP_TAGS or tag == 'title'
+        is_main = tag in MAIN_TAGS or attrib.get('role') == 'main' or attrib.get('id') == 'content' \
+            or 'content' in (attrib.get('class') or '').split()
+        self.stack.append((is_skip, is_main, is_title))
+        self.skip_depth += is_skip
+        self.main_depth += is_main
+        if is_title:
+            self.in_title = True
+            self.title_seen = True
+    
+    def end(self, tag):
+        if not self.stack:
+            return
+        is_skip, is_main, is_title = self.stack.pop()
+        self.skip_depth -= is_skip
+        self.main_depth -= is_main
+        if is_title:
+            self.in_title = False
+    
+    def data(self, data):
+        if self.in_title:
+            self.title_parts.append(data)
+        elif self.skip_depth == 0:
+            if self.main_depth > 0:
+                self.main_parts.append(data)
+                self.main_chars += len(data)
+            else:
+                self.body_parts.append(data)
+                self.body_chars += len(data)
+    
+    def comment(self, text):
+        pass
+    
+    def close(self):
+        return None
+
+class PageExtractor:
+    def __init__(self, encoding: Optional[str] = None, max_chars: int = MAX_CONTENT_CHARS):
+        self.encoding = encoding
+        self.max_chars = max_chars
+        self.collector = _TextCollector()
+        self.buffered = []
+        self.parser = None
+        if etree is not None:
+            try:
+                self.parser = etree.HTMLParser(target=self.collector, encoding=codecs.lookup(encoding).name if encoding else None, recover=True)
+            except LookupError:
+                self.parser = etree.HTMLParser(target=self.collector, recover=True)
+    
+    def feed(self, chunk: bytes) -> bool:
+        if self.parser is None:
+            self.buffered.append(chunk)
+            return False
+        
+        self.parser.feed(chunk)
+        return self._has_enough()
+    
+    def _has_enough(self) -> bool:
+        collector = self.collector
+        if collector.main_chars < self.max_chars * 2 and collector.body_chars < self.max_chars * 8:
+            return False
+        main_text = clean_text(' '.join(collector.main_parts))
+        return len(main_text) >= self.max_chars or (not main_text and len(clean_text(' '.join(collector.body_parts))) >= self.max_chars)
+    
+    def close(self) -> Dict[str, str]:
+        if self.parser is None:
+            return parse_page(b''.join(self.buffered).decode(self.encoding or 'utf-8', errors='replace'))
+        
+        try:
+            self.parser.close()
+        except etree.XMLSyntaxError:
+            pass
+        
+        text = clean_text(' '.join(self.collector.main_parts))
+        if not text:
+            text = clean_text(' '.join(self.collector.body_parts))
+        
+        return {
+            'title': ''.join(self.collector.title_parts).strip(),
+            'content': text[:self.max_chars]
+        }
+
+def parse_page_bytes(chunks: Iterable[bytes], encoding: Optional[str] = None, max_chars: int = MAX_CONTENT_CHARS) -> Dict[str, str]:
+    extractor = PageExtractor(encoding, max_chars)
+    for chunk in chunks:
+        if extractor.feed(chunk):
+            break
+    return extractor.close()
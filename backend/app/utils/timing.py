@@ -0,0 +1,27 @@
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Dict, TypeVar
+
+T = TypeVar("T")
+
+class StageTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+    
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+    
+    async def time(self, name: str, awaitable: Awaitable[T]) -> T:
+        with self.stage(name):
+            return await awaitable
+    
+    def as_dict(self) -> Dict[str, float]:
+        timings = {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()}
+        timings["total"] = round((time.perf_counter() - self.started) * 1000, 1)
+        return timings
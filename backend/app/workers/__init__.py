@@ -0,0 +1,3 @@
+from .search_job_worker import SearchJobWorker, search_job_worker
+
+__all__ = ["SearchJobWorker", "search_job_worker"]
@@ -0,0 +1,76 @@
+import asyncio
+import uuid
+from typing import List, Optional
+from app.config import settings
+from app.database.connection import SessionLocal
+from app.database.crud import SearchJobCRUD
+from app.services import worker_pool
+from app.services.search_pipeline import SearchRequest, run_search
+
+class SearchJobWorker:
+    def __init__(self, concurrency: int = settings.JOB_WORKER_CONCURRENCY):
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = settings.JOB_POLL_INTERVAL
+        self.stale_after = settings.JOB_STALE_AFTER
+        self.max_attempts = settings.JOB_MAX_ATTEMPTS
+        self.worker_pool = worker_pool
+        self._tasks: List[asyncio.Task] = []
+    
+    def _claim(self) -> Optional[dict]:
+        db = SessionLocal()
+        try:
+            return SearchJobCRUD.claim_next(db, self.stale_after, self.max_attempts)
+        finally:
+            db.close()
+    
+    def _finish(self, job_id: uuid.UUID, result: Optional[dict], error: Optional[str]):
+        db = SessionLocal()
+        try:
+            SearchJobCRUD.finish_job(db, job_id, result, error)
+        finally:
+            db.close()
+    
+    async def _process(self, job: dict):
+        db = SessionLocal()
+        try:
+            response = await run_search(db, SearchRequest(query=job["query"], ttl_seconds=job["ttl_seconds"]))
+            result, error = response.dict(), None
+        except Exception as e:
+            print(f"Search job {job['id']} failed: {e}")
+            result, error = None, str(e) or type(e).__name__
+        finally:
+            db.close()
+        
+        await self.worker_pool.run_in_thread(self._finish, job["id"], result, error)
+    
+    async def _run_slot(self):
+        while True:
+            try:
+                job = await self.worker_pool.run_in_thread(self._claim)
+            except Exception as e:
+                print(f"Search job claim error: {e}")
+                job = None
+            
+            if job is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            await self._process(job)
+    
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run_slot()) for _ in range(self.concurrency)]
+    
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    async def run_forever(self):
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+search_job_worker = SearchJobWorker()
@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SENTENCES = [
+    "weather in new york",
+    "new york weather forecast",
+    "best places to visit in delhi",
+    "top tourist attractions in delhi",
+    "how to learn python",
+    "python learning resources",
+    "latest news on climate change",
+    "population of tokyo",
+    "how does photosynthesis work",
+    "recipe for chocolate cake",
+    "history of the roman empire",
+    "best laptops under 1000 dollars",
+    "symptoms of the flu",
+    "python vs javascript for beginners",
+    "cheap flights from london to paris",
+    "how to change a car tyre"
+]
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_worker(backend: str, model_name: str, onnx_file: str, repeats: int):
+    from app.services.embedding_service import load_model
+    
+    baseline_rss = peak_rss_mb()
+    start = time.perf_counter()
+    model = load_model(backend, model_name, onnx_file)
+    load_seconds = time.perf_counter() - start
+    
+    single = []
+    for _ in range(repeats):
+        for sentence in SENTENCES:
+            t = time.perf_counter()
+            model.encode(sentence)
+            single.append(time.perf_counter() - t)
+    
+    t = time.perf_counter()
+    for _ in range(repeats):
+        embeddings = model.encode(SENTENCES, batch_size=len(SENTENCES))
+    batch_seconds = (time.perf_counter() - t) / repeats
+    
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "rss_mb": peak_rss_mb() - baseline_rss,
+        "single_p50_ms": statistics.median(single) * 1000,
+        "batch_ms": batch_seconds * 1000,
+        "embeddings": embeddings.tolist()
+    }))
+
+def cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = sum(x * x for x in a) ** 0.5
+    norm_b = sum(y * y for y in b) ** 0.5
+    return dot / (norm_a * norm_b)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding backends: load time, memory, latency and cosine agreement")
+    parser.add_argument("--model", default=os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2"))
+    parser.add_argument("--onnx-file", default="", help="ONNX file to test as an extra backend, e.g. onnx/model_qint8_avx512.onnx")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--worker", nargs=2, metavar=("BACKEND", "ONNX_FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.worker:
+        run_worker(args.worker[0], args.model, args.worker[1], args.repeats)
+        return
+    
+    variants = [("torch", ""), ("onnx", "")]
+    if args.onnx_file:
+        variants.append(("onnx", args.onnx_file))
+    
+    results = {}
+    for backend, onnx_file in variants:
+        label = f"{backend}:{onnx_file}" if onnx_file else backend
+        completed = subprocess.run(
+            [sys.executable, __file__, "--model", args.model, "--repeats", str(args.repeats), "--worker", backend, onnx_file],
+            capture_output=True,
+            text=True,
+            cwd=BACKEND_DIR
+        )
+        if completed.returncode != 0:
+            print(f"{label}: failed\n{completed.stderr.strip().splitlines()[-1] if completed.stderr else ''}")
+            continue
+        results[label] = json.loads(completed.stdout.strip().splitlines()[-1])
+    
+    reference = results.get("torch")
+    print(f"{'backend':<36} {'load s':>7} {'rss MB':>8} {'p50 ms':>8} {'batch ms':>9} {'min cos':>8} {'mean cos':>9}")
+    for label, stats in results.items():
+        if reference:
+            agreement = [cosine(a, b) for a, b in zip(reference["embeddings"], stats["embeddings"])]
+            min_cos, mean_cos = f"{min(agreement):.4f}", f"{statistics.mean(agreement):.4f}"
+        else:
+            min_cos = mean_cos = "-"
+        print(f"{label:<36} {stats['load_seconds']:>7.2f} {stats['rss_mb']:>8.0f} {stats['single_p50_ms']:>8.2f} {stats['batch_ms']:>9.2f} {min_cos:>8} {mean_cos:>9}")
+
+if __name__ == "__main__":
+    main()
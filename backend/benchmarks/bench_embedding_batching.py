@@ -0,0 +1,53 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUERIES = [
+    "weather in new york",
+    "best places to visit in delhi",
+    "how to learn python",
+    "latest news on climate change",
+    "population of tokyo",
+    "how does photosynthesis work",
+    "recipe for chocolate cake",
+    "history of the roman empire"
+]
+
+async def run(service, concurrency: int, requests: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def one(i: int):
+        async with semaphore:
+            await service.generate_embedding(f"{QUERIES[i % len(QUERIES)]} {i}")
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding throughput with and without micro-batching")
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--wait-ms", type=float, default=5)
+    args = parser.parse_args()
+    
+    from app.services.embedding_service import embedding_service
+    
+    embedding_service.cache_size = 0
+    embedding_service._cache.clear()
+    
+    print(f"{'batch':>6} {'conc':>5} {'emb/s':>9}")
+    for batch_size in [1, args.batch_size]:
+        embedding_service.batch_size = batch_size
+        embedding_service.batch_wait = args.wait_ms / 1000
+        for concurrency in args.concurrency:
+            throughput = asyncio.run(run(embedding_service, concurrency, args.requests))
+            print(f"{batch_size:>6} {concurrency:>5} {throughput:>9.1f}")
+
+if __name__ == "__main__":
+    main()
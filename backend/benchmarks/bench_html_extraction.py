@@ -0,0 +1,70 @@
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.html_parser import parse_page, parse_page_bytes, HTML_PARSER
+
+def synthetic_corpus() -> dict:
+    sentence = "This is a fairly long sentence about travel destinations and local attractions worth visiting"
+    pages = {}
+    for name, paragraphs in [("small", 50), ("medium", 2000), ("large", 12000)]:
+        body = "".join(f"<p>{sentence} number {i}. {sentence} again.</p><script>var x = {i};</script>" for i in range(paragraphs))
+        pages[f"synthetic-{name}"] = f"<html><head><title>{name}</title></head><body><nav>menu</nav><main>{body}</main></body></html>".encode()
+    return pages
+
+def load_corpus(path: str) -> dict:
+    pages = {}
+    for file_path in sorted(glob.glob(os.path.join(path, "**", "*.htm*"), recursive=True)):
+        with open(file_path, "rb") as f:
+            pages[os.path.relpath(file_path, path)] = f.read()
+    return pages
+
+def measure(extract, html: bytes, repeats: int) -> tuple:
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        extract(html)
+        durations.append(time.perf_counter() - start)
+    
+    tracemalloc.start()
+    extract(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(durations) * 1000, peak / (1024 * 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare BeautifulSoup and incremental HTML extraction")
+    parser.add_argument("--corpus", help="directory of saved .html pages (defaults to a synthetic corpus)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    parser.add_argument("--max-bytes", type=int, default=2000000)
+    args = parser.parse_args()
+    
+    pages = load_corpus(args.corpus) if args.corpus else synthetic_corpus()
+    
+    def soup(html: bytes):
+        return parse_page(html.decode("utf-8", errors="replace"))
+    
+    def incremental(html: bytes):
+        body = html[:args.max_bytes]
+        return parse_page_bytes(body[i:i + args.chunk_size] for i in range(0, len(body), args.chunk_size))
+    
+    print(f"bs4 parser={HTML_PARSER} pages={len(pages)}")
+    print(f"{'page':<40} {'KB':>8} {'soup ms':>9} {'soup MB':>8} {'incr ms':>9} {'incr MB':>8}")
+    totals = {"soup": 0.0, "incremental": 0.0}
+    for name, html in pages.items():
+        soup_ms, soup_mb = measure(soup, html, args.repeats)
+        incr_ms, incr_mb = measure(incremental, html, args.repeats)
+        totals["soup"] += soup_ms
+        totals["incremental"] += incr_ms
+        print(f"{name[:40]:<40} {len(html) / 1024:>8.0f} {soup_ms:>9.1f} {soup_mb:>8.1f} {incr_ms:>9.1f} {incr_mb:>8.1f}")
+    print(f"{'total':<40} {'':>8} {totals['soup']:>9.1f} {'':>8} {totals['incremental']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TOPICS = [
+    "tokyo", "paris", "new york", "delhi", "cairo", "sydney", "berlin", "lima",
+    "python", "rust", "photosynthesis", "black holes", "roman empire", "jazz",
+    "chocolate cake", "marathon training", "solar panels", "electric cars"
+]
+TEMPLATES = [
+    "best things to do in {}",
+    "history of {}",
+    "how does {} work",
+    "beginner guide to {}",
+    "latest news about {}",
+    "interesting facts about {}"
+]
+
+def build_queries(unique: int, seed: int) -> list:
+    candidates = [template.format(topic) for template in TEMPLATES for topic in TOPICS]
+    random.Random(seed).shuffle(candidates)
+    return candidates[:unique]
+
+def synthetic_corpus(pages: int, paragraphs: int) -> list:
+    corpus = []
+    for i in range(pages):
+        topic = TOPICS[i % len(TOPICS)]
+        body = "".join(
+            f"<p>Paragraph {j} of page {i} about {topic}, with enough ordinary prose to look like an article.</p>"
+            for j in range(paragraphs)
+        )
+        corpus.append(
+            f"<html><head><title>Page {i}: {topic}</title></head>"
+            f"<body><nav>menu</nav><article>{body}</article><script>var page = {i};</script></body></html>"
+        )
+    return corpus
+
+def load_corpus(path: str) -> list:
+    corpus = []
+    for file_path in sorted(glob.glob(os.path.join(path, "**", "*.htm*"), recursive=True)):
+        with open(file_path, encoding="utf-8", errors="replace") as f:
+            corpus.append(f.read())
+    return corpus
+
+def create_fake_web(corpus: list, base_url: str, results_per_query: int, page_latency: float):
+    from fastapi import FastAPI, Response
+    
+    fake = FastAPI()
+    
+    @fake.get("/html/")
+    async def search(q: str = ""):
+        start = int(hashlib.sha1(q.encode()).hexdigest(), 16) % len(corpus)
+        links = "".join(
+            f'<div class="result"><h2><a class="result__a" href="{base_url}/pages/{(start + i) % len(corpus)}">'
+            f'Result {i}</a></h2></div>'
+            for i in range(results_per_query)
+        )
+        return Response(f"<html><body>{links}</body></html>", media_type="text/html")
+    
+    @fake.get("/pages/{page_id}")
+    async def page(page_id: int):
+        if page_latency:
+            await asyncio.sleep(page_latency)
+        return Response(corpus[page_id % len(corpus)], media_type="text/html")
+    
+    return fake
+
+def serve_in_thread(asgi_app, port: int):
+    import uvicorn
+    
+    server = uvicorn.Server(uvicorn.Config(asgi_app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 120
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError(f"Server on port {port} failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+def summarize(samples: list) -> dict:
+    return {
+        "count": len(samples),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000
+    }
+
+async def run_load(api_url: str, queries: list, requests: int, concurrency: int, seed: int) -> tuple:
+    import httpx
+    
+    rng = random.Random(seed)
+    plan = [rng.choice(queries) for _ in range(requests)]
+    latencies = []
+    outcomes = Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async with httpx.AsyncClient(base_url=api_url, timeout=300) as client:
+        async def one(query: str):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.post("/api/search", json={"query": query})
+                    if response.status_code != 200:
+                        outcomes[f"http_{response.status_code}"] += 1
+                    else:
+                        body = response.json()
+                        outcomes["cached" if body.get("from_cache") else body.get("status", "unknown")] += 1
+                except Exception as e:
+                    outcomes[type(e).__name__] += 1
+                latencies.append(time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        await asyncio.gather(*(one(query) for query in plan))
+        elapsed = time.perf_counter() - start
+    
+    return elapsed, latencies, outcomes
+
+def reset_tables():
+    from sqlalchemy import text
+    from app.database.connection import engine, init_db
+    
+    init_db()
+    with engine.begin() as conn:
+        conn.execute(text(
+            "TRUNCATE query_group_mappings, query_groups, search_results, queries, llm_cache, page_cache, search_jobs"
+        ))
+
+def compare(report: dict, baseline_path: str, tolerance: float) -> list:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    
+    regressions = []
+    rows = [("request", report["request"], baseline.get("request", {}))]
+    rows += [(name, stats, baseline.get("stages", {}).get(name, {})) for name, stats in report["stages"].items()]
+    for name, current, previous in rows:
+        before = previous.get("p95_ms")
+        if not before:
+            continue
+        change = (current["p95_ms"] - before) / before
+        print(f"  {name:<22} p95 {before:>9.1f} -> {current['p95_ms']:>9.1f} ms ({change:+.0%})")
+        if change > tolerance:
+            regressions.append(name)
+    
+    before = baseline.get("throughput")
+    if before:
+        change = (report["throughput"] - before) / before
+        print(f"  {'throughput':<22} {before:>9.1f} -> {report['throughput']:>9.1f} req/s ({change:+.0%})")
+        if change < -tolerance:
+            regressions.append("throughput")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end load test of /api/search with a fake search engine, page corpus and Gemini")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--unique-queries", type=int, default=40, help="distinct queries; the rest of the requests repeat them")
+    parser.add_argument("--results-per-query", type=int, default=5)
+    parser.add_argument("--corpus", help="directory of saved .html pages (defaults to a synthetic corpus)")
+    parser.add_argument("--pages", type=int, default=60, help="synthetic corpus size")
+    parser.add_argument("--paragraphs", type=int, default=200, help="paragraphs per synthetic page")
+    parser.add_argument("--page-latency", type=float, default=0.05, help="seconds the fake web waits before each page")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds the stub Gemini backend waits per call")
+    parser.add_argument("--api-port", type=int, default=8765)
+    parser.add_argument("--web-port", type=int, default=8766)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--reset", action="store_true", help="truncate the search and cache tables first (benchmark database only)")
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--baseline", help="JSON report to compare p95s and throughput against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression against the baseline")
+    args = parser.parse_args()
+    
+    web_url = f"http://127.0.0.1:{args.web_port}"
+    os.environ["GEMINI_BACKEND"] = "stub"
+    os.environ["GEMINI_STUB_LATENCY"] = str(args.llm_latency)
+    os.environ["SEARCH_ENGINE_URL"] = f"{web_url}/html/?q="
+    os.environ["HTTP2_ENABLED"] = "false"
+    os.environ["EMBEDDING_PRELOAD"] = "true"
+    
+    from app.main import app
+    from app.services import metrics
+    
+    stage_samples = defaultdict(list)
+    metrics.add_stage_observer(lambda name, elapsed: stage_samples[name].append(elapsed))
+    
+    if args.reset:
+        reset_tables()
+    
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.pages, args.paragraphs)
+    queries = build_queries(args.unique_queries, args.seed)
+    
+    web_server, web_thread = serve_in_thread(create_fake_web(corpus, web_url, args.results_per_query, args.page_latency), args.web_port)
+    api_server, api_thread = serve_in_thread(app, args.api_port)
+    try:
+        elapsed, latencies, outcomes = asyncio.run(
+            run_load(f"http://127.0.0.1:{args.api_port}", queries, args.requests, args.concurrency, args.seed)
+        )
+    finally:
+        api_server.should_exit = True
+        web_server.should_exit = True
+        api_thread.join()
+        web_thread.join()
+    
+    report = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "unique_queries": len(queries),
+        "elapsed_s": elapsed,
+        "throughput": args.requests / elapsed,
+        "outcomes": dict(outcomes),
+        "request": summarize(latencies),
+        "stages": {name: summarize(samples) for name, samples in sorted(stage_samples.items())}
+    }
+    
+    print(f"requests={args.requests} concurrency={args.concurrency} unique={len(queries)} pages={len(corpus)} "
+          f"llm_latency={args.llm_latency}s page_latency={args.page_latency}s")
+    print(f"throughput {report['throughput']:.1f} req/s over {elapsed:.1f}s  outcomes {dict(outcomes)}")
+    print(f"{'stage':<24} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in [("request", report["request"])] + list(report["stages"].items()):
+        print(f"{name:<24} {stats['count']:>7} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    
+    if args.baseline:
+        print(f"compared with {args.baseline}:")
+        regressions = compare(report, args.baseline, args.tolerance)
+        if regressions:
+            print(f"regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
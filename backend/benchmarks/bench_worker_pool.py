@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.html_parser import parse_page, HTML_PARSER
+
+def build_page(paragraphs: int) -> str:
+    sentence = "This is a fairly long sentence about travel destinations and local attractions worth visiting"
+    body = "".join(f"<p>{sentence} number {i}. {sentence} again.</p><script>var x = {i};</script>" for i in range(paragraphs))
+    return f"<html><head><title>Benchmark page</title></head><body><nav>menu</nav><main>{body}</main></body></html>"
+
+async def measure_loop_lag(stop: asyncio.Event, samples: list, interval: float = 0.01):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - start - interval)
+
+async def run_requests(concurrency: int, requests: int, handler) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    lag_samples = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop, lag_samples))
+    
+    async def one():
+        async with semaphore:
+            await handler()
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    
+    stop.set()
+    await lag_task
+    
+    return {
+        "throughput": requests / elapsed,
+        "max_lag_ms": max(lag_samples, default=0.0) * 1000,
+        "p50_lag_ms": (statistics.median(lag_samples) if lag_samples else 0.0) * 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inline vs worker-pool parsing/encoding under concurrent requests")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--paragraphs", type=int, default=400)
+    parser.add_argument("--mode", choices=["thread", "process"], default="process")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--embedding", action="store_true", help="also encode the page text with the embedding model")
+    args = parser.parse_args()
+    
+    os.environ["WORKER_POOL_MODE"] = args.mode
+    os.environ["WORKER_POOL_SIZE"] = str(args.workers)
+    from app.services.worker_pool import WorkerPool
+    pool = WorkerPool()
+    
+    model = None
+    if args.embedding:
+        from sentence_transformers import SentenceTransformer
+        from app.config import settings
+        model = SentenceTransformer(settings.EMBEDDING_MODEL)
+    
+    html = build_page(args.paragraphs)
+    
+    async def inline_handler():
+        parsed = parse_page(html)
+        if model is not None:
+            model.encode(parsed['content'][:512])
+    
+    async def pooled_handler():
+        parsed = await pool.run(parse_page, html)
+        if model is not None:
+            await pool.run_in_thread(model.encode, parsed['content'][:512])
+    
+    print(f"parser={HTML_PARSER} mode={args.mode} workers={args.workers} cpus={os.cpu_count()} embedding={args.embedding}")
+    print(f"{'handler':<8} {'conc':>5} {'req/s':>9} {'p50 lag ms':>11} {'max lag ms':>11}")
+    for name, handler in [("inline", inline_handler), ("pool", pooled_handler)]:
+        for concurrency in args.concurrency:
+            stats = asyncio.run(run_requests(concurrency, args.requests, handler))
+            print(f"{name:<8} {concurrency:>5} {stats['throughput']:>9.1f} {stats['p50_lag_ms']:>11.1f} {stats['max_lag_ms']:>11.1f}")
+    
+    pool.shutdown()
+
+if __name__ == "__main__":
+    main()
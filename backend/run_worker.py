@@ -0,0 +1,25 @@
+import asyncio
+from app.config import settings
+from app.database import init_db
+from app.database.connection import dispose_async_engine
+from app.services import embedding_service, http_service, worker_pool
+from app.workers import search_job_worker
+
+async def main():
+    init_db()
+    await http_service.start()
+    if settings.EMBEDDING_PRELOAD:
+        await embedding_service.warm_up()
+    try:
+        await search_job_worker.run_forever()
+    finally:
+        await http_service.close()
+        await dispose_async_engine()
+        worker_pool.shutdown()
+
+if __name__ == "__main__":
+    print(f"Starting search job worker with {search_job_worker.concurrency} slots...")
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("Search job worker stopped")
@@ -0,0 +1,29 @@
+import base64
+import uuid
+from datetime import datetime
+import pytest
+from app.utils.helpers import encode_cursor, decode_cursor
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 17, 9, 30, 12, 345678)
+    query_id = uuid.uuid4()
+    
+    cursor = encode_cursor(created_at, query_id)
+    
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, query_id)
+
+def raw_cursor(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    "////",
+    raw_cursor("2024-05-17T09:30:12"),
+    raw_cursor("yesterday|" + str(uuid.uuid4())),
+    raw_cursor("2024-05-17T09:30:12|not-a-uuid"),
+    base64.urlsafe_b64encode(b"\xff\xfe|x").decode()
+])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
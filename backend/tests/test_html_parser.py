@@ -0,0 +1,54 @@
+import pytest
+from app.utils.html_parser import PageExtractor, parse_page, parse_page_bytes, MAX_CONTENT_CHARS
+
+SENTENCE = "This paragraph has enough words to survive the cleaning step of the extractor."
+
+PAGES = {
+    "main": f"<html><head><title>Main Page</title></head><body><nav>Home About Contact</nav>"
+            f"<main><p>{SENTENCE}</p><p>{SENTENCE} Again.</p></main><footer>Footer links here</footer></body></html>",
+    "article": f"<html><head><title> Spaced   Title </title><style>p {{ color: red; }}</style></head>"
+               f"<body><article><p>{SENTENCE}</p><script>var x = 1;</script></article></body></html>",
+    "body_only": f"<html><head><title>Plain</title></head><body><div><p>{SENTENCE}</p><p>{SENTENCE}</p></div></body></html>",
+    "svg_titles": f"<html><head><title>Real Page Title</title></head><body><svg><title>Close</title></svg>"
+                  f"<main><p>{SENTENCE}</p><svg><title>Search icon</title></svg></main></body></html>",
+}
+
+def chunked(html: str, size: int):
+    data = html.encode("utf-8")
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_incremental_extraction_matches_parse_page(name):
+    html = PAGES[name]
+    assert parse_page_bytes(chunked(html, 16)) == parse_page(html)
+
+def test_only_the_document_title_is_used():
+    assert parse_page_bytes([PAGES["svg_titles"].encode()])["title"] == "Real Page Title"
+
+def test_content_is_capped():
+    body = "".join(f"<p>{SENTENCE} Number {i}.</p>" for i in range(2000))
+    parsed = parse_page_bytes(chunked(f"<html><body><main>{body}</main></body></html>", 4096))
+    assert len(parsed["content"]) == MAX_CONTENT_CHARS
+
+def test_extractor_reports_enough_text_before_the_body_ends():
+    body = "".join(f"<p>{SENTENCE} Number {i}.</p>" for i in range(2000))
+    chunks = chunked(f"<html><body><main>{body}</main></body></html>", 4096)
+    extractor = PageExtractor()
+    
+    fed = 0
+    for chunk in chunks:
+        fed += 1
+        if extractor.feed(chunk):
+            break
+    
+    assert fed < len(chunks)
+    assert len(extractor.close()["content"]) == MAX_CONTENT_CHARS
+
+def test_declared_encoding_is_used():
+    html = f"<html><head><title>Café</title></head><body><main><p>{SENTENCE}</p></main></body></html>"
+    parsed = parse_page_bytes([html.encode("latin-1")], encoding="latin-1")
+    assert parsed["title"] == "Café"
+
+def test_unknown_encoding_falls_back_to_detection():
+    parsed = parse_page_bytes([PAGES["main"].encode()], encoding="not-a-charset")
+    assert parsed == parse_page(PAGES["main"])
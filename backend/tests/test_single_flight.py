@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from app.services.single_flight import SingleFlight
+
+def test_followers_share_the_leader_result():
+    flight = SingleFlight()
+    calls = 0
+    
+    async def factory():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+    
+    async def main():
+        return await asyncio.gather(*(flight.run("weather in tokyo", factory) for _ in range(5)))
+    
+    assert asyncio.run(main()) == ["result"] * 5
+    assert calls == 1
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "exact_followers": 4, "neighbour_followers": 0}
+
+def test_exception_reaches_every_caller_and_key_is_forgotten():
+    flight = SingleFlight()
+    calls = 0
+    
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("scrape failed")
+    
+    async def main():
+        results = await asyncio.gather(*(flight.run("q", failing) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+        with pytest.raises(ValueError):
+            await flight.run("q", failing)
+    
+    asyncio.run(main())
+    assert calls == 2
+
+def test_cancelled_follower_does_not_cancel_the_leader():
+    flight = SingleFlight()
+    
+    async def factory():
+        await asyncio.sleep(0.02)
+        return 42
+    
+    async def main():
+        leader = asyncio.create_task(flight.run("q", factory))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.run("q", factory))
+        await asyncio.sleep(0)
+        follower.cancel()
+        return await leader
+    
+    assert asyncio.run(main()) == 42
+
+def test_similar_embedding_joins_the_in_flight_run():
+    flight = SingleFlight(similarity_threshold=0.95)
+    calls = 0
+    
+    async def factory():
+        nonlocal calls
+        calls += 1
+        run_id = calls
+        await asyncio.sleep(0.01)
+        return run_id
+    
+    async def main():
+        return await asyncio.gather(
+            flight.run("weather tokyo", factory, embedding=[1.0, 0.0, 0.1]),
+            flight.run("tokyo weather", factory, embedding=[1.0, 0.01, 0.1]),
+            flight.run("pasta recipe", factory, embedding=[0.0, 1.0, 0.0])
+        )
+    
+    first, second, third = asyncio.run(main())
+    assert first == second
+    assert third != first
+    assert flight.stats()["neighbour_followers"] == 1
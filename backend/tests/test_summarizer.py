@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from app.agents.summarizer_agent import SummarizerAgent, IncompleteSummaryError
+
+RESULTS = [{"title": "Tokyo guide", "content": "Tokyo has many neighbourhoods worth visiting, from Asakusa to Shibuya and beyond."}]
+
+class FakeGemini:
+    def __init__(self, tokens, fail_after=None, full="Complete summary."):
+        self.tokens = tokens
+        self.fail_after = fail_after
+        self.full = full
+        self.generate_calls = 0
+    
+    async def generate_content_stream(self, prompt):
+        for i, token in enumerate(self.tokens):
+            if i == self.fail_after:
+                raise RuntimeError("stream dropped")
+            yield token
+    
+    async def generate_content(self, prompt, **kwargs):
+        self.generate_calls += 1
+        return self.full
+
+def make_agent(gemini):
+    agent = SummarizerAgent()
+    agent.gemini = gemini
+    return agent
+
+async def collect(agent):
+    return [token async for token in agent.stream_summary("tokyo", RESULTS)]
+
+def test_stream_failure_after_first_token_is_signalled():
+    agent = make_agent(FakeGemini(["Tokyo ", "is ", "big."], fail_after=1))
+    
+    with pytest.raises(IncompleteSummaryError):
+        asyncio.run(collect(agent))
+
+def test_stream_failure_before_first_token_yields_fallback():
+    agent = make_agent(FakeGemini(["Tokyo "], fail_after=0))
+    
+    tokens = asyncio.run(collect(agent))
+    assert len(tokens) == 1
+    assert tokens[0].startswith("Based on the search for 'tokyo'")
+
+def test_interrupted_stream_is_replaced_by_a_full_summary():
+    gemini = FakeGemini(["Tokyo ", "is ", "big."], fail_after=2)
+    agent = make_agent(gemini)
+    streamed = []
+    
+    summary = asyncio.run(agent.summarize_results("tokyo", RESULTS, on_token=streamed.append))
+    assert streamed == ["Tokyo ", "is "]
+    assert summary == "Complete summary."
+    assert gemini.generate_calls == 1
+
+def test_complete_stream_is_joined():
+    gemini = FakeGemini(["Tokyo ", "is ", "big. "])
+    agent = make_agent(gemini)
+    streamed = []
+    
+    summary = asyncio.run(agent.summarize_results("tokyo", RESULTS, on_token=streamed.append))
+    assert summary == "Tokyo is big."
+    assert streamed == ["Tokyo ", "is ", "big. "]
+    assert gemini.generate_calls == 0